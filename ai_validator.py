@@ -1,10 +1,147 @@
 from openai import OpenAI
 import json
-from typing import Dict, Optional
-import traceback
+import re
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from verdict_cache import VerdictCache
+
+from bot_logging import get_logger
+
+logger = get_logger('ai')
+
+MODEL = "google/gemini-flash-1.5"
+# Bump whenever the prompt changes, so cached verdicts from the old prompt are not reused
+PROMPT_VERSION = 1
+# Log the pre-classifier counters at INFO after this many classifications
+PRECLASSIFIER_LOG_INTERVAL = 50
+
+# Local pre-classification rules. They only decide the clear-cut cases; anything
+# ambiguous (partial reports, refusals, jokes) still goes to the model.
+NUMBERED_ITEM = re.compile(r'^\s*([1-3])\s*[.):-]\s*(\S.*)$')
+YESTERDAY_HEADING = re.compile(r'^\W*(yesterday|hôm qua|hom qua)\b', re.IGNORECASE)
+TODAY_HEADING = re.compile(r'^\W*(today|hôm nay|hom nay)\b', re.IGNORECASE)
+BLOCKER_HEADING = re.compile(
+    r'^\W*(blockers?|impediments?|issues?|khó khăn|kho khan|vướng mắc|vuong mac)\b', re.IGNORECASE
+)
+MENTION_ONLY = re.compile(r'^(@[\w.\-]+[\s,:]*)+.{0,40}$')
+REPORT_HINT = re.compile(r'\d|yesterday|today|blocker|hôm qua|hôm nay|hom qua|hom nay', re.IGNORECASE)
+CHATTER = re.compile(
+    r'^(ok(ay)?|oke|thanks?|thank you|ty|lol|haha+|cảm ơn|cam on|dạ|vâng|ừ|\+1)[\s!.]*$', re.IGNORECASE
+)
+# Refusals and insults get the model's dramatic treatment, never a local verdict
+REFUSAL_WORDS = re.compile(
+    r"\b(fuck\w*|hell no|won'?t report|đéo|deo report|không thích|khong thich)\b", re.IGNORECASE
+)
+VIETNAMESE_CHARS = re.compile(r'[ăâđêôơưạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ]', re.IGNORECASE)
+
+
+VALIDATION_RULES = """- Some time user respond seems vauge like "Done the CRUD API of User", "continue fixing the feedback bug", Just let the report pass / accept the report, PM will understand because he know the context. As long as they described what they did, you don't need to understand it.
+- If user say something like "Nothing, my work already done", let them pass the report without checking for all the parts, since all their tasks for the project already done.
+- Important: respond using user's language, user may use other language, like Vietnamese. Ex. If message was in Vietnamese, respond using Vietnamese. If message was English, respond using English.
+- If user were sick or have personal issue, show empathy and accept the report.
+- User allowed to said None or nothing if they haven't done anything yesterday or will do nothing today. They just need to explain. For example:"working on another project" is an accepted explaination.
+- User allowed to not report anything or skip blockers if there is no blockers.
+- Try to use friendly, natural, GenZ humor
+- If the message not look like a report or tagging someone, user might texting someone else, tell user not to reply in this thread unless they have a report. use other thread
+- Explain to user separately each part if they did right or wrong, why it was wrong? And how they would improve
+- If user refused to report or rage, swear at the bot like "hell no", "fuck", "won't report", "đéo report", "không thích",... Threaten them to report (in a dramatic humorous way) and remind them missing report will affect their performance point.
+- User allowed to report in format 1.<they enter what they did> 2. <they enter what they doing> 3. <they enter what are the blockers>. As long as they described what happened, pass the report.
+- Make sure you understand the slang. "Ko" means no in Vietnamese.
+- Encourage user to include the Jira task code (example JAR-123), but not required. Can pass if they don't include."""
+
+
+class ReportPreclassifier:
+    """Deterministic fast path that settles obvious reports without an LLM call."""
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.escalated = 0
+        self._lock = Lock()
+
+    def classify(self, report_text: str) -> Optional[Dict[str, any]]:
+        """Return a verdict for clear-cut reports, or None to escalate to the model."""
+        verdict = self._classify(report_text)
+        with self._lock:
+            if verdict is None:
+                self.escalated += 1
+            elif verdict["valid"]:
+                self.accepted += 1
+            else:
+                self.rejected += 1
+            total = self.accepted + self.rejected + self.escalated
+        if total % PRECLASSIFIER_LOG_INTERVAL == 0:
+            stats = self.stats()
+            logger.info(
+                "Pre-classifier: %s accepted, %s rejected, %s escalated to the model (hit rate %.0f%%)",
+                stats["accepted"], stats["rejected"], stats["escalated"], stats["hit_rate"] * 100
+            )
+        return verdict
+
+    def stats(self) -> Dict[str, any]:
+        with self._lock:
+            total = self.accepted + self.rejected + self.escalated
+            return {
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "escalated": self.escalated,
+                "hit_rate": (self.accepted + self.rejected) / total if total else 0.0,
+            }
+
+    def _classify(self, report_text: str) -> Optional[Dict[str, any]]:
+        text = report_text.strip()
+        if not text or REFUSAL_WORDS.search(text):
+            return None
+        vietnamese = bool(VIETNAMESE_CHARS.search(text))
+        lines = [line for line in text.splitlines() if line.strip()]
+
+        # "1. ... 2. ... 3. ..." with something written after every number
+        numbered = {}
+        for line in lines:
+            match = NUMBERED_ITEM.match(line)
+            if match:
+                numbered.setdefault(match.group(1), match.group(2))
+        if len(numbered) == 3:
+            return self._accepted(vietnamese)
+
+        # Yesterday / today (/ blockers) headings, in English or Vietnamese
+        has_yesterday = any(YESTERDAY_HEADING.match(line) for line in lines)
+        has_today = any(TODAY_HEADING.match(line) for line in lines)
+        has_blockers = any(BLOCKER_HEADING.match(line) for line in lines)
+        if has_yesterday and has_today and (has_blockers or len(lines) >= 3):
+            return self._accepted(vietnamese)
+
+        # A one-liner at someone else, or a bare "ok"/"thanks", is not a report
+        if len(lines) == 1 and len(text) <= 60 and not REPORT_HINT.search(text) and \
+                (MENTION_ONLY.match(text) or CHATTER.match(text)):
+            return self._off_topic(vietnamese)
+
+        return None
+
+    @staticmethod
+    def _accepted(vietnamese: bool) -> Dict[str, any]:
+        if vietnamese:
+            message = "Cảm ơn bạn đã gửi report! ✅ **Report đã được chấp nhận**, bạn không cần trả lời thêm nhé."
+        else:
+            message = "Thanks for the report! ✅ **The report is accepted**, no need to reply further."
+        return {"valid": True, "message": message}
+
+    @staticmethod
+    def _off_topic(vietnamese: bool) -> Dict[str, any]:
+        if vietnamese:
+            message = ("Thread này chỉ dành cho daily report thôi nha 😅 "
+                       "Nếu muốn nói chuyện thì qua thread khác giúp mình, còn report thì cứ reply ở đây.")
+        else:
+            message = ("This thread is just for daily reports 😅 "
+                       "Please chat in another thread, and only reply here with your report.")
+        return {"valid": False, "message": message}
+
 
 class AIValidator:
-    def __init__(self, api_key: str, site_url: str = "", site_name: str = "", enabled: bool = True):
+    def __init__(self, api_key: str, site_url: str = "", site_name: str = "", enabled: bool = True,
+                 timeout: float = 60, cache: Optional[VerdictCache] = None,
+                 preclassify: bool = True, base_url: str = "https://openrouter.ai/api/v1"):
         """Initialize the AI validator.
         
         Args:
@@ -12,33 +149,40 @@ class AIValidator:
             site_url (str, optional): Site URL for rankings. Defaults to "".
             site_name (str, optional): Site name for rankings. Defaults to "".
             enabled (bool, optional): Whether the validator is enabled. Defaults to True.
+            timeout (float, optional): Seconds allowed per report, across all retries. Defaults to 60.
+            cache (VerdictCache, optional): Reuse verdicts for identical reports. Defaults to None.
+            preclassify (bool, optional): Settle clear-cut reports locally before calling the model. Defaults to True.
+            base_url (str, optional): OpenAI-compatible API to call. Defaults to OpenRouter.
         """
-        print("\n=== Initializing AI Validator ===")
-        print(f"AI Validation Enabled: {enabled}")
-        print(f"API Key provided: {'Yes' if api_key else 'No'}")
-        print(f"Site URL: {site_url}")
-        print(f"Site Name: {site_name}")
+        logger.debug("Initializing AI validator")
+        logger.debug("AI Validation Enabled: %s", enabled)
+        logger.debug("API Key provided: %s", 'Yes' if api_key else 'No')
+        logger.debug("Site URL: %s", site_url)
+        logger.debug("Site Name: %s", site_name)
         
         self.enabled = enabled
+        self.timeout = timeout
+        self.cache = cache
+        self.preclassifier = ReportPreclassifier() if preclassify else None
         if not enabled:
-            print("AI Validation is disabled, skipping initialization")
+            logger.info("AI Validation is disabled, skipping initialization")
             return
             
         if not api_key:
-            print("WARNING: No API key provided, AI validation will not work")
+            logger.warning("No API key provided, AI validation will not work")
             self.enabled = False
             return
             
-        print("Initializing OpenAI client...")
+        logger.debug("Initializing OpenAI client...")
         self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
+            base_url=base_url,
             api_key=api_key,
         )
         self.extra_headers = {
             "HTTP-Referer": site_url,
             "X-Title": site_name,
         }
-        print("AI Validator initialization complete")
+        logger.info("AI Validator initialization complete")
         
     def validate_report(self, report_text: str) -> Dict[str, any]:
         """Validate a daily report using AI.
@@ -51,18 +195,54 @@ class AIValidator:
                 - valid (bool): Whether the report is valid
                 - message (str): Response message for the user
         """
-        print("\n=== Starting Report Validation ===")
-        print(f"Report text to validate: {report_text}")
+        logger.debug("Starting report validation")
+        logger.debug("Report text to validate: %s", report_text)
         
         if not self.enabled:
-            print("AI validation is disabled, returning default response")
+            logger.info("AI validation is disabled, returning default response")
             return {"valid": True, "message": "AI validation is disabled"}
-            
+
+        verdict, cache_key = self.precheck(report_text)
+        if verdict is not None:
+            return verdict
+        return self._validate_with_ai(report_text, cache_key)
+
+    def precheck(self, report_text: str) -> Tuple[Optional[Dict[str, any]], Optional[str]]:
+        """Settle a report without calling the model, if possible.
+
+        Returns:
+            (verdict, cache_key): verdict is None when the model must be asked;
+            cache_key identifies the report in the verdict cache, if one is configured.
+        """
+        if self.preclassifier is not None:
+            verdict = self.preclassifier.classify(report_text)
+            if verdict is not None:
+                logger.debug("Report settled by the local pre-classifier")
+                return verdict, None
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = VerdictCache.make_key(report_text, MODEL, PROMPT_VERSION)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Returning cached verdict")
+                return cached, cache_key
+        return None, cache_key
+
+    def _validate_with_ai(self, report_text: str, cache_key: Optional[str] = None) -> Dict[str, any]:
         max_retries = 3
+        deadline = time.monotonic() + self.timeout
         for attempt in range(max_retries):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Validation timed out after %ss", self.timeout)
+                return {
+                    "valid": True,  # Default to true when we run out of time
+                    "message": "Unable to validate report at this time"
+                }
             try:
-                print(f"\nAttempt {attempt + 1} of {max_retries}")
-                print("Constructing AI prompt...")
+                logger.debug("Attempt %s of %s", attempt + 1, max_retries)
+                logger.debug("Constructing AI prompt...")
                 # Construct the prompt for the AI
                 prompt = f"""Please analyze this daily report and check if it follows proper scrum report format.
                 A proper daily report should include:
@@ -79,26 +259,15 @@ class AIValidator:
                 - message: string with either thanks for a good report or instructions on how to improve. If the report is valid, notice them **the report is accepted** and they don't need to reply further
                 
                 Remember:
-                - Some time user respond seems vauge like "Done the CRUD API of User", "continue fixing the feedback bug", Just let the report pass / accept the report, PM will understand because he know the context. As long as they described what they did, you don't need to understand it.
-                - If user say something like "Nothing, my work already done", let them pass the report without checking for all the parts, since all their tasks for the project already done.
-                - Important: respond using user's language, user may use other language, like Vietnamese. Ex. If message was in Vietnamese, respond using Vietnamese. If message was English, respond using English.
-                - If user were sick or have personal issue, show empathy and accept the report.
-                - User allowed to said None or nothing if they haven't done anything yesterday or will do nothing today. They just need to explain. For example:"working on another project" is an accepted explaination.
-                - User allowed to not report anything or skip blockers if there is no blockers.
-                - Try to use friendly, natural, GenZ humor
-                - If the message not look like a report or tagging someone, user might texting someone else, tell user not to reply in this thread unless they have a report. use other thread
-                - Explain to user separately each part if they did right or wrong, why it was wrong? And how they would improve
-                - If user refused to report or rage, swear at the bot like "hell no", "fuck", "won't report", "đéo report", "không thích",... Threaten them to report (in a dramatic humorous way) and remind them missing report will affect their performance point.
-                - User allowed to report in format 1.<they enter what they did> 2. <they enter what they doing> 3. <they enter what are the blockers>. As long as they described what happened, pass the report.
-                - Make sure you understand the slang. "Ko" means no in Vietnamese.
-                - Encourage user to include the Jira task code (example JAR-123), but not required. Can pass if they don't include.
+{VALIDATION_RULES}
                 Only return the JSON, no other text."""
 
-                print("Calling OpenRouter API...")
+                logger.debug("Calling OpenRouter API...")
                 # Call the AI
                 completion = self.client.chat.completions.create(
-                    model="google/gemini-flash-1.5",
+                    model=MODEL,
                     extra_headers=self.extra_headers,
+                    timeout=remaining,
                     messages=[
                         {
                             "role": "user",
@@ -107,38 +276,29 @@ class AIValidator:
                     ]
                 )
                 
-                print("Received API response, parsing result...")
+                logger.debug("Received API response, parsing result...")
                 # Parse the AI response
                 response = completion.choices[0].message.content
-                print(f"Raw AI response: {response}")
+                logger.debug("Raw AI response: %s", response)
                 
                 try:
-                    # Clean up the response - remove all markdown code block markers
-                    cleaned_response = response.strip()
-                    
-                    # Remove opening code block markers
-                    if '```json' in cleaned_response:
-                        cleaned_response = cleaned_response.replace('```json', '')
-                    if '```' in cleaned_response:
-                        cleaned_response = cleaned_response.replace('```', '')
-                    
-                    # Remove any remaining backticks and trailing commas before closing braces
-                    cleaned_response = cleaned_response.replace('`', '').strip()
-                    cleaned_response = cleaned_response.replace(',}', '}')  # Remove trailing comma before closing brace
-                    cleaned_response = cleaned_response.replace(',\n}', '\n}')  # Remove trailing comma before newline and closing brace
-                    
-                    print(f"Cleaned response: {cleaned_response}")
+                    cleaned_response = self._clean_response(response)
+                    logger.debug("Cleaned response: %s", cleaned_response)
                     
                     result = json.loads(cleaned_response)
                     # Verify the response has the required fields
                     if 'valid' in result and 'message' in result:
-                        print(f"Successfully parsed result on attempt {attempt + 1}")
-                        return {
+                        logger.debug("Successfully parsed result on attempt %s", attempt + 1)
+                        verdict = {
                             "valid": result["valid"],
                             "message": result["message"]
                         }
+                        # Only real verdicts are cached, never the fallbacks below
+                        if cache_key is not None:
+                            self.cache.put(cache_key, verdict)
+                        return verdict
                     else:
-                        print(f"Missing required fields in response: {result}")
+                        logger.warning("Missing required fields in response: %s", result)
                         if attempt == max_retries - 1:
                             return {
                                 "valid": True,  # Default to true on last attempt
@@ -147,7 +307,7 @@ class AIValidator:
                         continue  # Try again if we have attempts left
                         
                 except json.JSONDecodeError as e:
-                    print(f"Error parsing AI response as JSON on attempt {attempt + 1}: {e}")
+                    logger.error("Error parsing AI response as JSON on attempt %s: %s", attempt + 1, e)
                     if attempt == max_retries - 1:
                         return {
                             "valid": True,  # Default to true on last attempt
@@ -156,8 +316,7 @@ class AIValidator:
                     continue  # Try again if we have attempts left
                 
             except Exception as e:
-                print(f"Error validating report with AI on attempt {attempt + 1}: {str(e)}")
-                print(f"Full error: {traceback.format_exc()}")
+                logger.error("Error validating report with AI on attempt %s: %s", attempt + 1, e, exc_info=True)
                 if attempt == max_retries - 1:
                     return {
                         "valid": True,  # Default to true on last attempt
@@ -169,4 +328,105 @@ class AIValidator:
         return {
             "valid": True,
             "message": "Unable to properly validate report after multiple attempts"
-        } 
\ No newline at end of file
+        }
+
+    def validate_batch(self, report_texts: List[str], cache_keys: Optional[List[Optional[str]]] = None) -> List[Dict[str, any]]:
+        """Validate several reports with a single model request.
+
+        Callers should settle fast-path reports with precheck() first. Entries
+        the model skips or answers with malformed JSON are retried one by one
+        through the single-report path.
+
+        Args:
+            report_texts (List[str]): Reports to validate
+            cache_keys (List[Optional[str]], optional): Cache keys from precheck(), one per report
+
+        Returns:
+            List of verdicts in the same order as report_texts
+        """
+        if cache_keys is None:
+            cache_keys = [None] * len(report_texts)
+        if not self.enabled:
+            return [{"valid": True, "message": "AI validation is disabled"} for _ in report_texts]
+        if len(report_texts) == 1:
+            return [self._validate_with_ai(report_texts[0], cache_keys[0])]
+
+        logger.info("=== Validating batch of %s reports ===", len(report_texts))
+        reports_block = "\n\n".join(
+            f"### Report {index}\n{report_text}" for index, report_text in enumerate(report_texts)
+        )
+        prompt = f"""Please analyze each of the following daily reports and check if it follows proper scrum report format.
+A proper daily report should include:
+1. What was accomplished yesterday
+2. What will be worked on today
+3. Any blockers or impediments
+
+Each report comes from a different user and must be judged on its own.
+
+{reports_block}
+
+Return a JSON array with one object per report, each with three fields:
+
+- index: the number of the report it refers to
+- valid: boolean indicating if the report follows the format
+- message: string with either thanks for a good report or instructions on how to improve. If the report is valid, notice them **the report is accepted** and they don't need to reply further
+
+Remember:
+{VALIDATION_RULES}
+Only return the JSON array, no other text."""
+
+        verdicts = {}
+        try:
+            logger.debug("Calling OpenRouter API...")
+            completion = self.client.chat.completions.create(
+                model=MODEL,
+                extra_headers=self.extra_headers,
+                timeout=self.timeout,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ]
+            )
+            response = completion.choices[0].message.content
+            logger.debug("Raw AI response: %s", response)
+            results = json.loads(self._clean_response(response))
+            if isinstance(results, dict):
+                results = results.get("results", [])
+            for result in results:
+                if isinstance(result, dict) and {'index', 'valid', 'message'} <= result.keys():
+                    verdicts[int(result["index"])] = {
+                        "valid": result["valid"],
+                        "message": result["message"]
+                    }
+        except Exception as e:
+            logger.error("Error validating batch with AI: %s", e, exc_info=True)
+
+        output = []
+        for index, report_text in enumerate(report_texts):
+            verdict = verdicts.get(index)
+            if verdict is None:
+                logger.info("No usable verdict for report %s in batch, retrying it alone", index)
+                verdict = self._validate_with_ai(report_text, cache_keys[index])
+            elif cache_keys[index] is not None:
+                self.cache.put(cache_keys[index], verdict)
+            output.append(verdict)
+        return output
+
+    @staticmethod
+    def _clean_response(response: str) -> str:
+        # Clean up the response - remove all markdown code block markers
+        cleaned_response = response.strip()
+
+        # Remove opening code block markers
+        if '```json' in cleaned_response:
+            cleaned_response = cleaned_response.replace('```json', '')
+        if '```' in cleaned_response:
+            cleaned_response = cleaned_response.replace('```', '')
+
+        # Remove any remaining backticks and trailing commas before closing braces
+        cleaned_response = cleaned_response.replace('`', '').strip()
+        cleaned_response = cleaned_response.replace(',}', '}')  # Remove trailing comma before closing brace
+        cleaned_response = cleaned_response.replace(',\n}', '\n}')  # Remove trailing comma before newline and closing brace
+        return cleaned_response
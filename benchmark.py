@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta
+from threading import Thread
+from typing import Dict, List
+
+from tabulate import tabulate
+
+from fake_mattermost import FakeChatCompletions, FakeMattermost, new_id
+
+BOT_USERNAME = 'scrum-bot'
+# Feedback posts start with "@username " (see ScrumBot._handle_report_reply)
+FEEDBACK_MENTION = re.compile(r'^@([\w.\-]+) ')
+PROJECTS = ['billing', 'search', 'mobile', 'checkout', 'infra', 'reporting', 'onboarding', 'payments']
+TASKS = ['the export job', 'login retries', 'the flaky e2e suite', 'API pagination', 'the release notes',
+         'cache invalidation', 'the dashboard filters', 'the migration script', 'code review backlog']
+CHATTER = ['ok', 'thanks!', 'noted', '+1', 'will do']
+
+
+class Scenario:
+    def __init__(self, teams: int, channels: int, users: int, team_size: int = None,
+                 reply_rate: float = 0.85, burst: float = 30.0, seed: int = 1):
+        """A generated Mattermost workspace plus the replies its users post.
+
+        Every team gets `channels` channels (and a town-square the bot skips),
+        each with `users` members drawn from a pool of `team_size` team
+        members, so people sit in several channels as they do in practice.
+        A `reply_rate` share of the requested (channel, user) pairs reply.
+        Reply times follow an exponential curve over `burst` seconds: most
+        people answer soon after the daily post and a long tail trickles in.
+        Replies mix structured reports (settled by the local pre-classifier),
+        free-form reports (sent to the model) and one-line chatter.
+
+        Args:
+            teams (int): Number of teams (N)
+            channels (int): Channels per team (M)
+            users (int): Members per channel (K)
+            team_size (int, optional): Users per team to draw members from. Defaults to 2 * users.
+            reply_rate (float, optional): Share of requested users who reply. Defaults to 0.85.
+            burst (float, optional): Seconds over which replies arrive. Defaults to 30.0.
+            seed (int, optional): Random seed. Defaults to 1.
+        """
+        rng = random.Random(seed)
+        self.burst = burst
+        self.bot_user = {'id': new_id(), 'username': BOT_USERNAME}
+        self.users = []
+        self.teams = []
+        self.channels = []
+        self.members = {}  # Format: {channel_id: [user_id]}
+        team_size = max(users, team_size or 2 * users)
+
+        for team_index in range(teams):
+            team = {'id': new_id(), 'name': f'team-{team_index}', 'display_name': f'Team {team_index}'}
+            self.teams.append(team)
+            pool = [{'id': new_id(), 'username': f'user{team_index}.{index}'} for index in range(team_size)]
+            self.users.extend(pool)
+            town_square = {'id': new_id(), 'team_id': team['id'], 'name': 'town-square',
+                           'display_name': 'Town Square', 'type': 'O'}
+            self.channels.append(town_square)
+            self.members[town_square['id']] = [self.bot_user['id']] + [user['id'] for user in pool]
+            for channel_index in range(channels):
+                name = f'{PROJECTS[channel_index % len(PROJECTS)]}-{team_index}-{channel_index}'
+                channel = {'id': new_id(), 'team_id': team['id'], 'name': name,
+                           'display_name': name.title(), 'type': 'O'}
+                self.channels.append(channel)
+                self.members[channel['id']] = [self.bot_user['id']] + [
+                    user['id'] for user in rng.sample(pool, users)
+                ]
+
+        self.replies = []  # Format: [(offset seconds, channel_id, user_id, message)]
+        for channel in self.channels:
+            if channel['name'] == 'town-square':
+                continue
+            for user_id in self.members[channel['id']][1:]:
+                if rng.random() < reply_rate:
+                    offset = min(burst, rng.expovariate(3.0 / burst)) if burst > 0 else 0.0
+                    self.replies.append((offset, channel['id'], user_id, self._reply_text(rng)))
+        self.replies.sort()
+
+    @staticmethod
+    def _reply_text(rng):
+        done, doing = rng.sample(TASKS, 2)
+        ticket = f'JAR-{rng.randint(100, 9999)}'
+        kind = rng.random()
+        if kind < 0.55:
+            return f'1. Finished {done} ({ticket})\n2. Working on {doing}\n3. No blockers'
+        if kind < 0.9:
+            return (f'Wrapped up {done} for {ticket} and started on {doing}, '
+                    f'should be ready for review by tomorrow. Nothing blocking me right now.')
+        return rng.choice(CHATTER)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            'teams': len(self.teams),
+            'channels': len(self.channels) - len(self.teams),
+            'users': len(self.users),
+            'replies': len(self.replies),
+        }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def latest_reporting_day(now: datetime) -> datetime:
+    # send_daily_report skips Sundays; benchmark on Saturday's date instead
+    return now - timedelta(days=1) if now.strftime('%A') == 'Sunday' else now
+
+
+def configure_environment(mattermost: FakeMattermost, completions: FakeChatCompletions, db_path: str, args):
+    """Point the bot's configuration at the fakes. Must run before bot/config are imported."""
+    os.environ.update({
+        'MATTERMOST_URL': mattermost.url,
+        'BOT_TOKEN': 'benchmark-token',
+        'BOT_USERNAME': BOT_USERNAME,
+        'AI_VALIDATION_ENABLED': 'true',
+        'OPENROUTER_API_KEY': 'benchmark-key',
+        'OPENROUTER_BASE_URL': completions.base_url,
+        'DB_PATH': db_path,
+        'VALIDATION_BATCH_ENABLED': 'true' if args.batch else 'false',
+        'LOG_LEVEL': args.log_level,
+    })
+
+
+def run(args) -> Dict[str, float]:
+    scenario = Scenario(args.teams, args.channels, args.users, team_size=args.team_size,
+                        reply_rate=args.reply_rate, burst=args.burst, seed=args.seed)
+    mattermost = FakeMattermost(scenario.bot_user, scenario.users, scenario.teams, scenario.channels,
+                                scenario.members, api_latency=args.api_latency)
+    completions = FakeChatCompletions(latency=args.llm_latency, jitter=args.llm_jitter, seed=args.seed)
+    mattermost.start()
+    completions.start()
+    results = dict(scenario.summary())
+
+    with tempfile.TemporaryDirectory(prefix='scrumbot-bench-') as data_dir:
+        configure_environment(mattermost, completions, os.path.join(data_dir, 'daily_reports.db'), args)
+        from bot import ScrumBot  # Reads the configuration set above
+        from config import TIMEZONE
+
+        # Startup: construction, login, channel discovery, websocket handshake
+        started = time.monotonic()
+        bot = ScrumBot()
+
+        def run_bot():
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            bot.start()
+
+        bot_thread = Thread(target=run_bot, name='benchmark-bot')
+        bot_thread.daemon = True
+        bot_thread.start()
+        if not mattermost.wait_for_websocket(args.timeout):
+            raise RuntimeError("Bot did not connect to the websocket")
+        results['startup_s'] = mattermost.websocket_connected_at - started
+        # Only the daily report and reminders measured below may run
+        bot.scheduler.cancel('daily_report')
+
+        # Daily-post fan-out
+        first_post = len(mattermost.posts)
+        started = time.monotonic()
+        bot.send_daily_report(latest_reporting_day(datetime.now(TIMEZONE)))
+        results['fanout_s'] = time.monotonic() - started
+        results['daily_posts'] = len(mattermost.posts_since(first_post))
+        pending = bot.report_tracker.pending_users()
+        for username in pending:
+            bot.scheduler.cancel(('reminder', username))
+
+        # Reply burst: post each reply at its offset, match the bot's feedback to it
+        usernames = {user['id']: user['username'] for user in scenario.users}
+        sent_at = {}  # Format: {(channel_id, username): monotonic time the reply was posted}
+        first_feedback = len(mattermost.posts)
+        burst_started = time.monotonic()
+        for offset, channel_id, user_id, message in scenario.replies:
+            report_info = bot.daily_report_posts.get(channel_id)
+            if report_info is None:
+                continue
+            delay = burst_started + offset - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            sent_at[(channel_id, usernames[user_id])] = time.monotonic()
+            mattermost.emit_post(user_id, channel_id, message, root_id=report_info['post_id'])
+
+        latencies = {}
+        deadline = time.monotonic() + args.timeout
+        while len(latencies) < len(sent_at) and time.monotonic() < deadline:
+            for post in mattermost.posts_since(first_feedback):
+                match = FEEDBACK_MENTION.match(post['message'])
+                key = (post['channel_id'], match.group(1)) if match else None
+                if post['root_id'] and key in sent_at and key not in latencies:
+                    latencies[key] = post['received_at'] - sent_at[key]
+            time.sleep(0.01)
+        values = list(latencies.values())
+        results.update({
+            'replies_sent': len(sent_at),
+            'feedback_received': len(values),
+            'burst_s': time.monotonic() - burst_started,
+            'reply_p50_s': percentile(values, 50),
+            'reply_p90_s': percentile(values, 90),
+            'reply_p99_s': percentile(values, 99),
+            'reply_max_s': max(values, default=0.0),
+            'model_requests': completions.requests,
+            'model_reports': completions.reports,
+        })
+
+        # Reminder tick: everyone still pending is reminded at once
+        pending = bot.report_tracker.pending_users()
+        first_dm = len(mattermost.posts)
+        started = time.monotonic()
+        for username in pending:
+            bot._run_reminder(username)
+        results['reminder_users'] = len(pending)
+        results['reminder_tick_ms'] = (time.monotonic() - started) * 1000
+        bot.direct_messenger.join()
+        results['reminder_delivery_s'] = time.monotonic() - started
+        results['reminder_dms'] = len(mattermost.posts_since(first_dm))
+        for username in pending:
+            bot.scheduler.cancel(('reminder', username))
+
+        results['rest_requests'] = sum(mattermost.request_counts.values())
+        bot.driver.websocket.disconnect()
+        bot.db.close()
+
+    mattermost.stop()
+    completions.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Replay a generated workspace against ScrumBot using a fake Mattermost and model endpoint'
+    )
+    parser.add_argument('--teams', type=int, default=3, help='Teams (N)')
+    parser.add_argument('--channels', type=int, default=10, help='Channels per team (M)')
+    parser.add_argument('--users', type=int, default=12, help='Members per channel (K)')
+    parser.add_argument('--team-size', type=int, help='Users per team to draw channel members from (default 2K)')
+    parser.add_argument('--reply-rate', type=float, default=0.85, help='Share of requested users who reply')
+    parser.add_argument('--burst', type=float, default=20.0, help='Seconds over which replies arrive')
+    parser.add_argument('--llm-latency', type=float, default=0.8, help='Seconds per model response')
+    parser.add_argument('--llm-jitter', type=float, default=0.4, help='Random extra seconds per model response')
+    parser.add_argument('--api-latency', type=float, default=0.005, help='Seconds added to each REST response')
+    parser.add_argument('--batch', action='store_true', help='Enable VALIDATION_BATCH_ENABLED')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the scenario')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Seconds to wait for the bot at each stage')
+    parser.add_argument('--log-level', default='WARNING', help="The bot's LOG_LEVEL during the run")
+    parser.add_argument('--json', help='Also write the results to this file, for comparing runs')
+    args = parser.parse_args()
+
+    results = run(args)
+    print(tabulate(
+        [(name, f'{value:.3f}' if isinstance(value, float) else value) for name, value in results.items()],
+        headers=['Metric', 'Value']
+    ))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,271 +1,316 @@
 import time
 import schedule
 from datetime import datetime, timedelta
-from threading import Thread
+from threading import Thread, Lock
+from concurrent.futures import ThreadPoolExecutor
 from mattermostdriver import Driver
 from database import Database
 from ai_validator import AIValidator
-import traceback
+from user_directory import UserDirectory
+from report_tracker import ReportTracker
+from scheduler import DeadlineScheduler
+from validation_pool import ValidationPool, ValidationBatcher
+from verdict_cache import VerdictCache
+from post_dispatcher import PostDispatcher
+from direct_messenger import DirectMessenger
+from websocket_events import EventDispatcher, JSON_BACKEND, loads, peek_post_fields
 from config import (
     MATTERMOST_URL, BOT_TOKEN, BOT_USERNAME,
     REPORT_TIME, REMINDER_INTERVAL, EXCLUDED_USERS,
     DAILY_REPORT_MESSAGE, REMINDER_MESSAGE, TIMEZONE,
-    AI_VALIDATION_ENABLED, OPENROUTER_API_KEY, SITE_URL, SITE_NAME,
-    TEAM_NAME
+    AI_VALIDATION_ENABLED, OPENROUTER_API_KEY, OPENROUTER_BASE_URL, SITE_URL, SITE_NAME,
+    TEAM_NAME, USER_CACHE_TTL, USER_CACHE_SIZE, STARTUP_CONCURRENCY,
+    VALIDATION_WORKERS, VALIDATION_QUEUE_SIZE, VALIDATION_TIMEOUT,
+    VERDICT_CACHE_SIZE, VERDICT_CACHE_TTL, VERDICT_CACHE_PERSIST, VERDICT_CACHE_DB_SIZE,
+    AI_PRECLASSIFY_ENABLED, VALIDATION_BATCH_ENABLED, VALIDATION_BATCH_WINDOW, VALIDATION_BATCH_SIZE,
+    POST_RATE_LIMIT, POST_BURST, POST_CONCURRENCY, POST_MAX_RETRIES
 )
 import ssl
 from urllib.parse import urlparse
-import json
 import asyncio
+from bot_logging import get_logger
+
+logger = get_logger('bot')
+
+CHANNEL_MEMBERS_PAGE_SIZE = 200
 
 class ScrumBot:
     def __init__(self):
-        base_url = MATTERMOST_URL.split(':8065')[0].replace('http://', '')
+        # Host, port and scheme of MATTERMOST_URL; without a port, https uses
+        # 443 and plain http Mattermost's default 8065
+        server = urlparse(MATTERMOST_URL if '//' in MATTERMOST_URL else f'http://{MATTERMOST_URL}')
+        scheme = server.scheme or 'http'
         
         self.driver = Driver({
-            'url': base_url,
+            'url': server.hostname,
             'token': BOT_TOKEN,
             'basepath': '/api/v4',
-            'port': 8065,
-            'scheme': 'http'
+            'port': server.port or (443 if scheme == 'https' else 8065),
+            'scheme': scheme
         })
         self.db = Database()
+        self.users = UserDirectory(self.driver, ttl=USER_CACHE_TTL, max_size=USER_CACHE_SIZE)
         self.channels = {}
-        self.pending_reminders = {}  # Format: {channel_id: {username: last_reminder_time}}
+        self.pending_reminders = {}  # Format: {username: last_reminder_time}
+        self.scheduler = DeadlineScheduler(TIMEZONE)
+        # Each report waiting on a batch holds a worker, so allow at least a full batch
+        self.validation_pool = ValidationPool(
+            self._handle_report_reply,
+            workers=max(VALIDATION_WORKERS, VALIDATION_BATCH_SIZE) if VALIDATION_BATCH_ENABLED else VALIDATION_WORKERS,
+            queue_size=VALIDATION_QUEUE_SIZE
+        )
+        # "Try again" replies for posts the full validation queue turned away;
+        # sent from here so the websocket loop never waits on HTTP
+        self._busy_replies = ThreadPoolExecutor(max_workers=1, thread_name_prefix='busy-reply')
+        self._report_lock = Lock()
+        self.post_dispatcher = PostDispatcher(
+            self.driver,
+            rate=POST_RATE_LIMIT,
+            burst=POST_BURST,
+            concurrency=POST_CONCURRENCY,
+            max_retries=POST_MAX_RETRIES
+        )
+        self.direct_messenger = DirectMessenger(self.driver, self.db, self.users, self.post_dispatcher)
         self.daily_report_posts = {}  # Store daily report post IDs for each channel
+        self.report_tracker = ReportTracker()
         
         # Initialize AI validator
+        self.verdict_cache = VerdictCache(
+            database=self.db if VERDICT_CACHE_PERSIST else None,
+            max_entries=VERDICT_CACHE_SIZE,
+            ttl=VERDICT_CACHE_TTL,
+            max_persisted=VERDICT_CACHE_DB_SIZE
+        )
         self.ai_validator = AIValidator(
             api_key=OPENROUTER_API_KEY,
             site_url=SITE_URL,
             site_name=SITE_NAME,
-            enabled=AI_VALIDATION_ENABLED
+            enabled=AI_VALIDATION_ENABLED,
+            timeout=VALIDATION_TIMEOUT,
+            cache=self.verdict_cache,
+            preclassify=AI_PRECLASSIFY_ENABLED,
+            base_url=OPENROUTER_BASE_URL
         )
+        self.validation_batcher = None
+        if VALIDATION_BATCH_ENABLED:
+            self.validation_batcher = ValidationBatcher(
+                self.ai_validator,
+                window=VALIDATION_BATCH_WINDOW,
+                max_items=VALIDATION_BATCH_SIZE
+            )
+
+        self.event_dispatcher = EventDispatcher()
+        self.event_dispatcher.register('hello', self._on_hello)
+        self.event_dispatcher.register('posted', self._on_posted, prefilter=self._wants_post)
 
     def start(self):
-        print("Bot started")
+        logger.info("Bot started")
         self.driver.login()
-        self.bot_id = self.driver.users.get_user_by_username(BOT_USERNAME)['id']
+        self.bot_id = self.users.get_user_id(BOT_USERNAME)
+        self.direct_messenger.start(self.bot_id)
         
         # Initialize channels the bot is a member of
-        print("\n=== Initializing channels ===")
-        try:
-            # First get the team memberships for the bot
-            print("Getting team memberships for bot...")
-            team_memberships = self.driver.teams.get_team_members_for_user('me')
-            print(f"Found {len(team_memberships)} team memberships:")
-            
-            for team_member in team_memberships:
-                team_id = team_member['team_id']
-                try:
-                    # Get team details
-                    team = self.driver.teams.get_team(team_id)
-                    print(f"\nTeam: {team['display_name']} (ID: {team_id})")
-                    
-                    # Get channels for this team
-                    print(f"Getting channels for team {team['display_name']}...")
-                    channels = self.driver.channels.get_channels_for_user('me', team_id)
-                    print(f"Found {len(channels)} channels in team {team['display_name']}")
-                    
-                    for channel in channels:
-                        print(f"\nProcessing channel: {channel.get('display_name', channel.get('name', 'Unknown'))}")
-                        print(f"Channel type: {channel.get('type', 'Unknown')}")
-                        print(f"Channel ID: {channel['id']}")
-                        
-                        try:
-                            self._update_channel_info(channel['id'])
-                            print(f"Successfully added channel: {channel.get('display_name', channel.get('name', 'Unknown'))}")
-                        except Exception as e:
-                            print(f"Error adding channel: {str(e)}")
-                            print(f"Channel error traceback: {traceback.format_exc()}")
-                            
-                except Exception as e:
-                    print(f"Error processing team {team_id}: {str(e)}")
-                    print(f"Team error traceback: {traceback.format_exc()}")
+        self._initialize_channels()
+        self.report_tracker.reset(self.db.get_today_reporters())
 
-        except Exception as e:
-            print(f"Error in initialization: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
-
-        print("\n=== Channel Initialization Summary ===")
-        print(f"Bot is member of {len(self.channels)} channels:")
+        logger.info("Bot is member of %s channels", len(self.channels))
         for channel_id, info in self.channels.items():
-            print(f"- Channel: {info['name']} (ID: {channel_id})")
-            print(f"  Members: {len(info['members'])} users")
-            print(f"  Member list: {info['members']}")
-        print("=" * 50)
+            logger.debug("Channel %s (ID: %s): %s members %s", info['name'], channel_id, len(info['members']), info['members'])
         
-        print("\n=== Setting up Daily Reports ===")
-        current_time = datetime.now(TIMEZONE)
-        print(f"Current time: {current_time}")
-        print(f"Setting report time to: {REPORT_TIME}")
-        print(f"Timezone: {TIMEZONE}")
-        print(f"Reminder interval: {REMINDER_INTERVAL} hours")
+        logger.info("Report time %s (%s), reminder interval %s hours", REPORT_TIME, TIMEZONE, REMINDER_INTERVAL)
         
         # Start the scheduler thread
-        scheduler_thread = Thread(target=self._run_scheduler)
+        self._schedule_daily_report()
+        scheduler_thread = Thread(target=self.scheduler.run)
         scheduler_thread.daemon = True
         scheduler_thread.start()
-        print("Scheduler thread started")
+        logger.info("Scheduler thread started")
+
+        if self.validation_batcher is not None:
+            self.validation_batcher.start()
+        self.validation_pool.start()
 
         # Keep your existing WebSocket initialization
         self.driver.init_websocket(self._handle_websocket_event)
 
-    def _run_scheduler(self):
-        print("\nScheduler thread starting...")
-        last_run_date = None
-        
+    def _initialize_channels(self):
+        """Discover teams, channels and members with a bounded worker pool.
+
+        Each phase fans out over STARTUP_CONCURRENCY workers and finishes
+        before the next one starts, so the per-phase timings logged at the
+        end show where startup time goes.
+        """
+        logger.info("Initializing channels with concurrency %s", STARTUP_CONCURRENCY)
+        timings = {}
+        try:
+            with ThreadPoolExecutor(max_workers=STARTUP_CONCURRENCY) as executor:
+                # Phase 1: teams the bot belongs to
+                phase_start = time.monotonic()
+                team_memberships = self.driver.teams.get_team_members_for_user('me')
+                team_ids = [team_member['team_id'] for team_member in team_memberships]
+                teams = {}
+                for team_id, result in zip(team_ids, executor.map(
+                        lambda team_id: self._call_safely(self.driver.teams.get_team, team_id),
+                        team_ids)):
+                    if isinstance(result, Exception):
+                        logger.error("Error processing team %s: %s", team_id, result)
+                        continue
+                    teams[team_id] = result
+                    logger.debug("Team: %s (ID: %s)", result['display_name'], team_id)
+                timings['teams'] = time.monotonic() - phase_start
+
+                # Phase 2: channels in each team, deduplicated across teams
+                phase_start = time.monotonic()
+                channels = {}
+                for team_id, result in zip(teams, executor.map(
+                        lambda team_id: self._call_safely(self.driver.channels.get_channels_for_user, 'me', team_id),
+                        teams)):
+                    if isinstance(result, Exception):
+                        logger.error("Error getting channels for team %s: %s", team_id, result)
+                        continue
+                    logger.debug("Found %s channels in team %s", len(result), teams[team_id]['display_name'])
+                    for channel in result:
+                        if channel['name'] != 'town-square':
+                            channels[channel['id']] = channel
+                timings['channels'] = time.monotonic() - phase_start
+
+                # Phase 3: channel memberships
+                phase_start = time.monotonic()
+                channel_members = {}
+                for channel_id, result in zip(channels, executor.map(
+                        lambda channel_id: self._call_safely(self._get_channel_member_ids, channel_id),
+                        channels)):
+                    if isinstance(result, Exception):
+                        logger.error("Error adding channel %s: %s", channel_id, result)
+                        continue
+                    channel_members[channel_id] = result
+                timings['members'] = time.monotonic() - phase_start
+
+            # Phase 4: resolve every member in bulk through the user directory
+            phase_start = time.monotonic()
+            all_member_ids = {user_id for member_ids in channel_members.values() for user_id in member_ids}
+            self.users.get_users(all_member_ids)
+            for channel_id, member_ids in channel_members.items():
+                self.channels[channel_id] = {
+                    'name': channels[channel_id]['name'],
+                    'members': self.users.get_usernames(member_ids)
+                }
+            timings['users'] = time.monotonic() - phase_start
+
+        except Exception as e:
+            logger.error("Error in initialization: %s", e, exc_info=True)
+
+        logger.info(
+            "Startup timing: %s, total %.2fs",
+            ", ".join(f"{phase} {elapsed:.2f}s" for phase, elapsed in timings.items()),
+            sum(timings.values())
+        )
+
+    @staticmethod
+    def _call_safely(func, *args):
+        # Return exceptions instead of raising them so one failing team or
+        # channel does not abort the whole executor.map() fan-out.
+        try:
+            return func(*args)
+        except Exception as e:
+            return e
+
+    def _get_channel_member_ids(self, channel_id):
+        member_ids = []
+        page = 0
         while True:
-            try:
-                current_time = datetime.now(TIMEZONE)
-                current_hour = current_time.strftime('%H')
-                current_minute = current_time.strftime('%M')
-                current_date = current_time.strftime('%Y-%m-%d')
-                
-                print(f"\n=== Scheduler Check at {current_time.strftime('%Y-%m-%d %H:%M:%S')} ===")
-                print(f"Current time: {current_hour}:{current_minute}")
-                print(f"Target time: {REPORT_TIME}")
-                
-                # Check if it's time to run and we haven't run today
-                target_hour, target_minute = REPORT_TIME.split(':')
-                if (current_hour == target_hour and 
-                    current_minute == target_minute and 
-                    current_date != last_run_date):
-                    
-                    print(f"\n!!! TRIGGERING DAILY REPORT at {current_time} !!!")
-                    self.send_daily_report()
-                    last_run_date = current_date
-                    print(f"Updated last run date to: {last_run_date}")
-                
-                # Check reminders every minute
-                self._check_reminders()
-                print("Checked reminders")
-                
-                time.sleep(60)  # Check every minute
-                
-            except Exception as e:
-                print(f"Error in scheduler loop: {str(e)}")
-                print(f"Full error: {traceback.format_exc()}")
-                time.sleep(60)
+            members = self.driver.channels.get_channel_members(
+                channel_id, params={'page': page, 'per_page': CHANNEL_MEMBERS_PAGE_SIZE}
+            )
+            member_ids.extend(member['user_id'] for member in members)
+            if len(members) < CHANNEL_MEMBERS_PAGE_SIZE:
+                return member_ids
+            page += 1
 
-    def _check_reminders(self):
-        current_time = datetime.now(TIMEZONE)
-        print("\n=== Checking Reminders ===")
-        print(f"Current time: {current_time}")
-        
-        # Track who we've reminded this round to avoid duplicates across channels
-        reminded_this_round = set()
-        
-        # Only check channels that have an active daily report
-        for channel_id, report_info in self.daily_report_posts.items():
-            channel_info = self.channels.get(channel_id, {})
-            print(f"\nChecking channel: {channel_info.get('name', 'Unknown')} ({channel_id})")
-            
-            # Initialize pending reminders for this channel if not exists
-            if channel_id not in self.pending_reminders:
-                self.pending_reminders[channel_id] = {}
-            
-            # Get users who have reported in this specific channel today
-            reported_users_in_channel = set(self.db.get_today_reports(channel_id))
-            print(f"Users who have reported in this channel today: {reported_users_in_channel}")
-            
-            if 'members' not in channel_info:
-                print("No members found in channel info")
-                continue
-            
-            for member in channel_info['members']:
-                # Skip if we've already reminded this user in this round or if they're excluded/bot
-                if (member in reminded_this_round or 
-                    member in EXCLUDED_USERS or 
-                    member == BOT_USERNAME):
-                    print(f"Skipping {member} - already reminded this round or excluded")
-                    continue
-                
-                # If user has reported in this channel, remove them from this channel's pending reminders
-                if member in reported_users_in_channel:
-                    print(f"Skipping {member} - has reported in this channel today")
-                    if member in self.pending_reminders[channel_id]:
-                        print(f"Removing {member} from pending reminders for channel {channel_id}")
-                        self.pending_reminders[channel_id].pop(member, None)
-                    continue
+    def _next_report_time(self, after):
+        report_time = datetime.strptime(REPORT_TIME, "%H:%M").time()
+        next_run = datetime.combine(after.date(), report_time, tzinfo=TIMEZONE)
+        if next_run <= after:
+            next_run += timedelta(days=1)
+        return next_run
 
-                print(f"\nChecking member: {member} for channel: {channel_id}")
-                
-                report_time = datetime.strptime(REPORT_TIME, "%H:%M").time()
-                report_datetime = datetime.combine(current_time.date(), report_time)
-                report_datetime = report_datetime.replace(tzinfo=TIMEZONE)
-                
-                # Use REMINDER_INTERVAL for first reminder too
-                if current_time >= report_datetime + timedelta(hours=REMINDER_INTERVAL):
-                    print(f"Time to send/update reminder for {member} in channel {channel_id}")
-                    if member not in self.pending_reminders[channel_id]:
-                        print(f"First reminder for {member} in channel {channel_id}")
-                        self.pending_reminders[channel_id][member] = current_time
-                        self._send_reminder_dm(member)
-                        reminded_this_round.add(member)
-                    else:
-                        last_reminder = self.pending_reminders[channel_id][member]
-                        # Use REMINDER_INTERVAL and >= for subsequent reminders
-                        if current_time >= last_reminder + timedelta(hours=REMINDER_INTERVAL):
-                            print(f"Follow-up reminder for {member} in channel {channel_id}")
-                            self.pending_reminders[channel_id][member] = current_time
-                            self._send_reminder_dm(member)
-                            reminded_this_round.add(member)
-                        else:
-                            print(f"Too soon for next reminder. Last reminder was at {last_reminder}")
-                else:
-                    print(f"Too soon to send reminder. Need to wait until {report_datetime + timedelta(hours=REMINDER_INTERVAL)}")
+    def _schedule_daily_report(self):
+        next_run = self._next_report_time(datetime.now(TIMEZONE))
+        self.scheduler.schedule('daily_report', next_run, self._run_daily_report)
+        logger.info("Next daily report scheduled for %s", next_run)
 
-    async def _handle_websocket_event(self, event):
+    def _run_daily_report(self):
+        logger.info("Triggering daily report at %s", datetime.now(TIMEZONE))
         try:
-            print(f"Received event type: {type(event)}")
-            print(f"Received event content: {event}")
-            
-            # Parse the string event into a dictionary if it's a string
-            if isinstance(event, str):
-                try:
-                    event = json.loads(event)
-                    print(f"Parsed event into dict: {event}")
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse event as JSON: {e}")
-                    return await asyncio.sleep(0)  # Return an awaitable
-
-            # Debug the event structure
-            print(f"Event keys: {event.keys() if isinstance(event, dict) else 'No keys (not a dict)'}")
-            print(f"Event 'event' value: {event.get('event')}")
-            print(f"Event 'data' value: {event.get('data')}")
-            
-            # Handle the initial hello event
-            if event.get('event') == 'hello':
-                print("Connected to websocket")
-                return await asyncio.sleep(0)  # Return an awaitable
-            
-            # Only proceed if we have data and it's a post event
-            if event.get('event') == 'posted':
-                print("Handling posted event")
-                data = event.get('data', {})
-                
-                # Parse the post data if it's a string
-                if isinstance(data.get('post'), str):
-                    try:
-                        post_data = json.loads(data['post'])
-                        print(f"Parsed post data: {post_data}")
-                        
-                        if post_data['user_id'] != self.bot_id:  # Ignore bot's own messages
-                            if post_data.get('root_id'):  # This is a reply in a thread
-                                self._handle_report_reply(post_data)
-                            else:
-                                self._handle_channel_message(post_data)
-                    except json.JSONDecodeError as e:
-                        print(f"Failed to parse post data: {e}")
-                
-            return await asyncio.sleep(0)  # Return an awaitable
+            self.send_daily_report()
+        finally:
+            self._schedule_daily_report()
 
+    def _schedule_reminder(self, username, when):
+        self.scheduler.schedule(('reminder', username), when, lambda: self._run_reminder(username))
+
+    def _run_reminder(self, username):
+        # Users who reported everywhere have their job cancelled, but check
+        # again in case the last report raced with the deadline.
+        if not self.report_tracker.pending_channels(username):
+            return
+        current_time = datetime.now(TIMEZONE)
+        self.pending_reminders[username] = current_time
+        self._send_reminder_dm(username)
+        self._schedule_reminder(username, current_time + timedelta(hours=REMINDER_INTERVAL))
+
+    async def _handle_websocket_event(self, event):
+        try:
+            self.event_dispatcher.dispatch(event)
         except Exception as e:
-            print(f"Error in websocket event handler: {e}")
-            print(f"Error type: {type(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
-            return await asyncio.sleep(0)  # Return an awaitable
+            logger.error("Error in websocket event handler: %s", e, exc_info=True)
+        return await asyncio.sleep(0)  # Return an awaitable
+
+    def _on_hello(self, event):
+        logger.info("Connected to websocket (JSON backend: %s)", JSON_BACKEND)
+
+    def _wants_post(self, raw):
+        """Prefilter for raw "posted" frames: keep only posts the bot acts on.
+
+        That is replies in a daily report thread, and top-level posts in
+        channels the bot does not know yet. Everything else (chatter in
+        known channels, other threads, the bot's own posts) is dropped
+        before decoding.
+        """
+        fields = peek_post_fields(raw)
+        if fields is None:
+            return True
+        user_id, channel_id, root_id = fields
+        if user_id == self.bot_id:
+            return False
+        if root_id:
+            return self._is_report_thread(channel_id, root_id)
+        return channel_id not in self.channels
+
+    def _on_posted(self, event):
+        post = event.get('data', {}).get('post')
+        if not isinstance(post, str):
+            return
+        try:
+            post_data = loads(post)
+        except ValueError as e:
+            logger.error("Failed to parse post data: %s", e)
+            return
+
+        if post_data['user_id'] == self.bot_id:  # Ignore bot's own messages
+            return
+        if post_data.get('root_id'):  # This is a reply in a thread
+            # Validation is slow (LLM call), so hand it to the worker
+            # pool and keep the websocket loop free for new events
+            if self._is_report_thread(post_data['channel_id'], post_data['root_id']):
+                if not self.validation_pool.submit(post_data):
+                    self._busy_replies.submit(self._send_busy_reply, post_data)
+        else:
+            self._handle_channel_message(post_data)
+
+    def _is_report_thread(self, channel_id, root_id):
+        report_info = self.daily_report_posts.get(channel_id)
+        return report_info is not None and report_info['post_id'] == root_id
 
     def _handle_report_reply(self, post):
         try:
@@ -273,56 +318,57 @@ class ScrumBot:
             root_id = post.get('root_id', '')
             
             # Check if this reply is in a daily report thread
-            if channel_id not in self.daily_report_posts or \
-               self.daily_report_posts[channel_id]['post_id'] != root_id:
-                print(f"Ignoring reply - not in a daily report thread")
+            report_info = self.daily_report_posts.get(channel_id)
+            if not self._is_report_thread(channel_id, root_id):
+                logger.debug("Ignoring reply - not in a daily report thread")
                 return
             
-            username = self.driver.users.get_user(post['user_id'])['username']
+            username = self.users.get_username(post['user_id'])
             message = post['message']
             
-            print(f"\n=== Handling Report Reply ===")
-            print(f"Channel ID: {channel_id}")
-            print(f"Username: {username}")
-            print(f"Message: {message}")
-            print(f"AI Validation Enabled: {self.ai_validator.enabled}")
+            logger.info("Handling report reply from %s in channel %s", username, channel_id)
+            logger.debug("Message: %s", message)
             
             # Validate report with AI if enabled
-            print("\nStarting AI validation...")
-            validation_result = self.ai_validator.validate_report(message)
-            print(f"Validation result: {validation_result}")
+            if self.validation_batcher is not None:
+                validation_result = self.validation_batcher.validate_report(message)
+            else:
+                validation_result = self.ai_validator.validate_report(message)
+            logger.info("Validation result for %s: valid=%s", username, validation_result["valid"])
             
             if validation_result["valid"]:
-                print("Report is valid, checking if user already reported today...")
-                if not self.db.has_reported_today(channel_id, username):
-                    print("User has not reported today, adding report to database...")
-                    channel = self.driver.channels.get_channel(channel_id)
-                    self.db.add_report(
-                        channel_id,
-                        channel['name'],
-                        username,
-                        message
-                    )
-                    print(f"Added report for {username}")
+                logger.debug("Report is valid, checking if user already reported today")
+                # Replies are handled on several workers; serialize the
+                # check-and-insert so a double post is only stored once
+                with self._report_lock:
+                    already_reported = self.report_tracker.has_reported(channel_id, username)
+                    if not already_reported:
+                        self.db.add_report(
+                            channel_id,
+                            report_info['channel_name'],
+                            username,
+                            message
+                        )
+                        self.report_tracker.mark_reported(channel_id, username)
+                        logger.info("Added report for %s", username)
                     
-                    # Remove from pending reminders for this specific channel if exists
-                    if channel_id in self.pending_reminders and username in self.pending_reminders[channel_id]:
-                        print(f"Removing {username} from pending reminders for channel {channel_id}")
-                        self.pending_reminders[channel_id].pop(username, None)
-                else:
-                    print(f"User {username} has already reported today")
-            else:
-                print("Report is not valid")
+                if already_reported:
+                    logger.info("User %s has already reported today", username)
+                elif not self.report_tracker.pending_channels(username):
+                    # Stop reminding once the user has reported in every requested channel
+                    logger.debug("Cancelling reminders for %s", username)
+                    self.scheduler.cancel(('reminder', username))
+                    self.pending_reminders.pop(username, None)
             
             # Send feedback to the user
             if validation_result["message"]:
-                print(f"Sending feedback to user: {validation_result['message']}")
+                logger.debug("Sending feedback to user: %s", validation_result['message'])
                 # Get the root_id from the post data
                 root_id = post.get('root_id', '')
                 if not root_id:
                     root_id = post.get('id', '')  # If no root_id, use the post's own id
                 
-                print(f"Using root_id: {root_id}")
+                logger.debug("Using root_id: %s", root_id)
                 post_data = {
                     'channel_id': channel_id,
                     'message': f"@{username} {validation_result['message']}"
@@ -333,12 +379,22 @@ class ScrumBot:
                     post_data['root_id'] = root_id
                     
                 self.driver.posts.create_post(post_data)
-                print("Feedback sent successfully")
+                logger.debug("Feedback sent successfully")
                 
         except Exception as e:
-            print(f"Error handling report reply: {e}")
-            print(f"Full error: {traceback.format_exc()}")
-            print(f"Post data: {post}")
+            logger.error("Error handling report reply: %s (post: %s)", e, post, exc_info=True)
+
+    def _send_busy_reply(self, post):
+        try:
+            username = self.users.get_username(post['user_id'])
+            self.post_dispatcher.create_post({
+                'channel_id': post['channel_id'],
+                'root_id': post['root_id'],
+                'message': f"@{username} I'm swamped with reports right now and couldn't check yours. "
+                           f"Please post it again in a few minutes 🙏"
+            })
+        except Exception as e:
+            logger.error("Error sending busy reply: %s", e, exc_info=True)
 
     def _handle_channel_message(self, post):
         # Update channel info when bot receives a message
@@ -351,123 +407,120 @@ class ScrumBot:
         
         # Skip Town Square channel
         if channel['name'] == 'town-square':
-            print(f"Skipping Town Square channel")
+            logger.debug("Skipping Town Square channel")
             return
             
-        members = self.driver.channels.get_channel_members(channel_id)
-        member_usernames = [
-            self.driver.users.get_user(member['user_id'])['username']
-            for member in members
-        ]
+        member_usernames = self.users.get_usernames(self._get_channel_member_ids(channel_id))
         self.channels[channel_id] = {
             'name': channel['name'],
             'members': member_usernames
         }
 
-    def send_daily_report(self):
+    def send_daily_report(self, current_time=None):
+        """Post the daily report request to every channel and schedule reminders.
+
+        Args:
+            current_time (datetime, optional): Time of the run; decides whether it
+                is a reporting day. Defaults to now.
+        """
         try:
-            current_time = datetime.now(TIMEZONE)
-            print(f"\n{'='*50}")
-            print(f"=== EXECUTING DAILY REPORT at {current_time} ===")
-            print(f"Current weekday: {current_time.strftime('%A')}")
+            current_time = current_time or datetime.now(TIMEZONE)
+            logger.info("Executing daily report at %s (%s)", current_time, current_time.strftime('%A'))
             
             # Check if it's a reporting day
             if current_time.strftime("%A").lower() not in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']:
-                print(f"Skipping report - not a reporting day ({current_time.strftime('%A')})")
+                logger.info("Skipping report - not a reporting day (%s)", current_time.strftime('%A'))
                 return
             
-            print(f"\nProcessing {len(self.channels)} channels...")
-            
             # Clear previous daily report posts and pending reminders
+            for username in self.report_tracker.pending_users():
+                self.scheduler.cancel(('reminder', username))
             self.daily_report_posts.clear()
             self.pending_reminders.clear()
+            self.report_tracker.reset(self.db.get_today_reporters())
             
+            # Format the date
+            date_str = current_time.strftime("%A, %B %d, %Y")
+
+            # Build every channel's post first, then send them all through the dispatcher
+            outgoing = []  # Format: [(channel_id, channel_name, requested_users, post options)]
             for channel_id, channel_info in self.channels.items():
-                try:
-                    channel_name = channel_info.get('name', '')
-                    print(f"\nProcessing channel: {channel_name} ({channel_id})")
-                    
-                    # Skip DM channels and Town Square
-                    if '__' in channel_name or channel_name == '' or channel_name == 'town-square':
-                        print(f"Skipping channel: {channel_name}")
-                        continue
-                    
-                    # Create user tags for all members except excluded users and the bot
-                    user_tags = []
-                    requested_users = []  # Track users who are being requested to report
-                    for member in channel_info.get('members', []):
-                        if member not in EXCLUDED_USERS and member != BOT_USERNAME:
-                            user_tags.append(f"@{member}")
-                            requested_users.append(member)
-                    
-                    # Format the date
-                    date_str = current_time.strftime("%A, %B %d, %Y")
-                    
-                    # Construct the message with date, user tags, and the configured message
-                    message = (
-                        f"## 🔔 **Daily Scrum Report for {date_str}**\n\n"
-                        f"{' '.join(user_tags)}\n\n"
-                        f"{DAILY_REPORT_MESSAGE}"
-                    )
-                    
-                    print(f"Attempting to send message to channel {channel_name}...")
-                    try:
-                        post = self.driver.posts.create_post({
-                            'channel_id': channel_id,
-                            'message': message
-                        })
-                        print(f"✅ Message sent successfully to {channel_name}! Post ID: {post['id']}")
-                        
-                        # Store the post ID for this channel
-                        self.daily_report_posts[channel_id] = {
-                            'post_id': post['id'],
-                            'channel_name': channel_name
-                        }
-                        
-                        # Initialize empty pending reminders for this channel
-                        self.pending_reminders[channel_id] = {}
-                        
-                        # Record the bot's request in the database
-                        self.db.add_bot_request(channel_id, channel_name, requested_users)
-                        print(f"Recorded report request for {len(requested_users)} users in {channel_name}")
-                        
-                    except Exception as e:
-                        print(f"❌ Error sending message: {str(e)}")
-                        print(f"Full error: {traceback.format_exc()}")
-                    
-                except Exception as e:
-                    print(f"Error processing channel {channel_info.get('name', 'Unknown')}: {str(e)}")
-                    print(f"Full error: {traceback.format_exc()}")
+                channel_name = channel_info.get('name', '')
+                
+                # Skip DM channels and Town Square
+                if '__' in channel_name or channel_name == '' or channel_name == 'town-square':
+                    logger.debug("Skipping channel: %s", channel_name)
+                    continue
+                
+                # Create user tags for all members except excluded users and the bot
+                user_tags = []
+                requested_users = []  # Track users who are being requested to report
+                for member in channel_info.get('members', []):
+                    if member not in EXCLUDED_USERS and member != BOT_USERNAME:
+                        user_tags.append(f"@{member}")
+                        requested_users.append(member)
+                
+                # Construct the message with date, user tags, and the configured message
+                message = (
+                    f"## 🔔 **Daily Scrum Report for {date_str}**\n\n"
+                    f"{' '.join(user_tags)}\n\n"
+                    f"{DAILY_REPORT_MESSAGE}"
+                )
+                outgoing.append((channel_id, channel_name, requested_users, {
+                    'channel_id': channel_id,
+                    'message': message
+                }))
+
+            logger.info("Sending daily report to %s channels...", len(outgoing))
+            send_started = time.monotonic()
+            results = self.post_dispatcher.create_posts([item[3] for item in outgoing])
+            logger.info("Daily report fan-out took %.2fs", time.monotonic() - send_started)
+
+            bot_requests = []
+            for (channel_id, channel_name, requested_users, _), post in zip(outgoing, results):
+                if isinstance(post, Exception):
+                    logger.error("❌ Error sending message to %s: %s", channel_name, post)
+                    continue
+                logger.debug("✅ Message sent successfully to %s! Post ID: %s", channel_name, post['id'])
+                
+                # Store the post ID for this channel
+                self.daily_report_posts[channel_id] = {
+                    'post_id': post['id'],
+                    'channel_name': channel_name
+                }
+                self.report_tracker.add_request(channel_id, requested_users)
+                bot_requests.append((channel_id, channel_name, requested_users))
+
+            # Record all of the bot's requests in one transaction
+            self.db.add_bot_requests(bot_requests)
+            logger.info("Recorded report requests for %s channels", len(bot_requests))
             
-            print("\n=== Daily report execution completed ===")
-            print("=" * 50)
+            # First reminder goes out REMINDER_INTERVAL after the daily report
+            first_reminder = current_time + timedelta(hours=REMINDER_INTERVAL)
+            for username in self.report_tracker.pending_users():
+                self._schedule_reminder(username, first_reminder)
+            logger.info("Scheduled reminders at %s", first_reminder)
+
+            logger.info("Daily report execution completed")
         except Exception as e:
-            print(f"Critical error in send_daily_report: {str(e)}")
-            print(f"Full error: {traceback.format_exc()}")
+            logger.error("Critical error in send_daily_report: %s", e, exc_info=True)
 
     def _send_reminder_dm(self, username):
         try:
-            # Create or get DM channel
-            user = self.driver.users.get_user_by_username(username)
-            dm_channel = self.driver.channels.create_direct_message_channel([self.bot_id, user['id']])
-            
             # Format the date
             current_time = datetime.now(TIMEZONE)
             date_str = current_time.strftime("%A, %B %d, %Y")
             
             # Find the channels where this user needs to report
             user_pending_channels = []
-            for channel_id, report_info in self.daily_report_posts.items():
-                channel_info = self.channels.get(channel_id, {})
-                if username in channel_info.get('members', []):
-                    # Check if user has reported in this channel
-                    reported_users = set(self.db.get_today_reports(channel_id))
-                    if username not in reported_users:
-                        channel_name = report_info['channel_name']
-                        post_id = report_info['post_id']
-                        # Include team name in the thread link
-                        thread_link = f"{SITE_URL}/{TEAM_NAME}/pl/{post_id}"
-                        user_pending_channels.append(f"[{channel_name}]({thread_link})")
+            for channel_id in sorted(self.report_tracker.pending_channels(username)):
+                report_info = self.daily_report_posts.get(channel_id)
+                if report_info:
+                    channel_name = report_info['channel_name']
+                    post_id = report_info['post_id']
+                    # Include team name in the thread link
+                    thread_link = f"{SITE_URL}/{TEAM_NAME}/pl/{post_id}"
+                    user_pending_channels.append(f"[{channel_name}]({thread_link})")
             
             # Only send reminder if there are pending channels
             if user_pending_channels:
@@ -481,19 +534,16 @@ class ScrumBot:
                 for channel_link in user_pending_channels:
                     message += f"• {channel_link}\n"
                 
-                # Send reminder message
-                self.driver.posts.create_post({
-                    'channel_id': dm_channel['id'],
-                    'message': message
-                })
-                print(f"Reminder sent to {username} for {len(user_pending_channels)} pending channels")
+                # Queue the reminder; the messenger resolves the cached DM channel
+                self.direct_messenger.send(username, message)
+                logger.debug("Reminder queued for %s for %s pending channels", username, len(user_pending_channels))
             else:
-                print(f"No pending channels to remind {username} about")
+                logger.debug("No pending channels to remind %s about", username)
                 
         except Exception as e:
-            print(f"Error sending reminder to {username}: {str(e)}")
+            logger.error("Error sending reminder to %s: %s", username, e)
 
 if __name__ == "__main__":
     bot = ScrumBot()
-    print("Bot started")
+    logger.info("Bot started")
     bot.start() 
\ No newline at end of file
@@ -0,0 +1,82 @@
+import json
+import logging
+import sys
+from threading import Lock
+from typing import Dict
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES
+
+_configured = False
+_configure_lock = Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a logger under the 'scrumbot' namespace, configuring output on first use."""
+    global _configured
+    with _configure_lock:
+        if not _configured:
+            handler = logging.StreamHandler(sys.stdout)
+            if LOG_FORMAT == 'json':
+                handler.setFormatter(JsonFormatter())
+            else:
+                handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+            root = logging.getLogger('scrumbot')
+            root.addHandler(handler)
+            root.setLevel(LOG_LEVEL)
+            root.propagate = False
+            _configured = True
+    return logging.getLogger(f'scrumbot.{name}')
+
+
+class Sampler:
+    def __init__(self, rates: Dict[str, float], default: float = 1.0):
+        """Decide which messages of a high-volume type get logged.
+
+        Args:
+            rates (Dict[str, float]): Fraction of messages to keep per type (0 drops all, 1 keeps all)
+            default (float, optional): Rate for types not listed. Defaults to 1.0.
+        """
+        self.rates = rates
+        self.default = default
+        self._counts = {}
+        self._lock = Lock()
+
+    def should_log(self, kind: str) -> bool:
+        rate = self.rates.get(kind, self.default)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        # Deterministic every-Nth sampling: no RNG call, and the first message always shows
+        with self._lock:
+            count = self._counts.get(kind, 0)
+            self._counts[kind] = count + 1
+        return count % round(1 / rate) == 0
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse 'typing=0,posted=1,status_change=0.01' into a rate map."""
+    rates = {}
+    for item in spec.split(','):
+        if '=' in item:
+            kind, rate = item.split('=', 1)
+            rates[kind.strip()] = float(rate)
+    return rates
+
+
+sampler = Sampler(parse_sample_rates(LOG_SAMPLE_RATES))
@@ -44,12 +44,51 @@ TEAM_NAME = os.getenv('TEAM_NAME', '')
 
 # User Configuration
 EXCLUDED_USERS = os.getenv('EXCLUDED_USERS', '').split(',')
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '3600'))  # seconds
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+
+# Posting Configuration
+POST_RATE_LIMIT = float(os.getenv('POST_RATE_LIMIT', '10'))  # posts per second
+POST_BURST = max(1, int(os.getenv('POST_BURST', '10')))  # posts sent back to back before throttling
+POST_CONCURRENCY = max(1, int(os.getenv('POST_CONCURRENCY', '8')))  # posts in flight at once
+POST_MAX_RETRIES = int(os.getenv('POST_MAX_RETRIES', '5'))  # retries on 429/5xx/connection errors
+
+# Startup Configuration
+STARTUP_CONCURRENCY = max(1, int(os.getenv('STARTUP_CONCURRENCY', '8')))  # 1 = sequential discovery
 
 # Database Configuration
-DB_PATH = 'daily_reports.db'
+DB_PATH = os.getenv('DB_PATH', 'daily_reports.db')
+DB_BUSY_TIMEOUT = int(os.getenv('DB_BUSY_TIMEOUT', '5000'))  # milliseconds
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '20000'))  # page cache per connection
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024)))  # bytes
+
+# Web Viewer Configuration
+API_CACHE_SIZE = int(os.getenv('API_CACHE_SIZE', '256'))  # rendered API responses kept in memory
+STATS_CACHE_SIZE = int(os.getenv('STATS_CACHE_SIZE', '64'))  # rendered /api/stats responses kept in memory
+WEB_HOST = os.getenv('WEB_HOST', '0.0.0.0')
+WEB_PORT = int(os.getenv('WEB_PORT', '5000'))
+WEB_THREADS = max(1, int(os.getenv('WEB_THREADS', '8')))  # request worker threads, one SQLite connection each
+WEB_CONNECTION_LIMIT = int(os.getenv('WEB_CONNECTION_LIMIT', '100'))  # open client connections before new ones wait
 
 # AI Validation Settings
 AI_VALIDATION_ENABLED = os.getenv('AI_VALIDATION_ENABLED', 'true').lower() == 'true'
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '')
+OPENROUTER_BASE_URL = os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1')  # any OpenAI-compatible API
 SITE_URL = os.getenv('SITE_URL', '')
-SITE_NAME = os.getenv('SITE_NAME', '') 
\ No newline at end of file
+SITE_NAME = os.getenv('SITE_NAME', '')
+AI_PRECLASSIFY_ENABLED = os.getenv('AI_PRECLASSIFY_ENABLED', 'true').lower() == 'true'  # local fast path
+VALIDATION_WORKERS = max(1, int(os.getenv('VALIDATION_WORKERS', '4')))  # concurrent validations
+VALIDATION_QUEUE_SIZE = int(os.getenv('VALIDATION_QUEUE_SIZE', '200'))  # replies waiting for a worker
+VALIDATION_TIMEOUT = float(os.getenv('VALIDATION_TIMEOUT', '60'))  # seconds per report, all retries included
+VALIDATION_BATCH_ENABLED = os.getenv('VALIDATION_BATCH_ENABLED', 'false').lower() == 'true'
+VALIDATION_BATCH_WINDOW = float(os.getenv('VALIDATION_BATCH_WINDOW', '2.0'))  # seconds to collect a batch
+VALIDATION_BATCH_SIZE = max(1, int(os.getenv('VALIDATION_BATCH_SIZE', '10')))  # reports per model request
+VERDICT_CACHE_SIZE = int(os.getenv('VERDICT_CACHE_SIZE', '1000'))  # verdicts kept in memory
+VERDICT_CACHE_TTL = float(os.getenv('VERDICT_CACHE_TTL', str(7 * 24 * 3600)))  # seconds
+VERDICT_CACHE_PERSIST = os.getenv('VERDICT_CACHE_PERSIST', 'true').lower() == 'true'
+VERDICT_CACHE_DB_SIZE = int(os.getenv('VERDICT_CACHE_DB_SIZE', '10000'))  # verdicts kept in SQLite
+
+# Logging Configuration
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()  # DEBUG shows per-event and per-attempt detail
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()  # 'text' or 'json'
+LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', '')  # e.g. 'posted=0.1,hello=1' for debug event logs
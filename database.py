@@ -1,65 +1,396 @@
 import sqlite3
+import threading
 from datetime import datetime
-from config import DB_PATH
+from config import DB_PATH, DB_BUSY_TIMEOUT, DB_CACHE_SIZE_KB, DB_MMAP_SIZE
 import json
 
+from bot_logging import get_logger
+
+logger = get_logger('database')
+
+def _migration_1_base_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel_id TEXT NOT NULL,
+            channel_name TEXT NOT NULL,
+            username TEXT NOT NULL,
+            report_date DATE NOT NULL,
+            message TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_report_requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel_id TEXT NOT NULL,
+            channel_name TEXT NOT NULL,
+            request_date DATE NOT NULL,
+            requested_users TEXT NOT NULL,  -- JSON array of usernames
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _migration_2_lookup_indexes(cursor):
+    # has_reported_today / get_today_reports
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_daily_reports_channel_date_user
+        ON daily_reports (channel_id, report_date, username)
+    ''')
+    # Monthly BETWEEN scans in view_reports
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_daily_reports_date
+        ON daily_reports (report_date)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bot_report_requests_date_channel
+        ON bot_report_requests (request_date, channel_id)
+    ''')
+    cursor.execute('ANALYZE')
+
+def _migration_3_verdict_cache(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ai_verdict_cache (
+            cache_key TEXT PRIMARY KEY,
+            valid INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ai_verdict_cache_expires
+        ON ai_verdict_cache (expires_at)
+    ''')
+
+def _migration_4_dm_channels(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dm_channels (
+            username TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+# (report_date, channel_id, username, channel_name) of every user asked in
+# the newest request per (day, channel): a later request for the same
+# channel and day replaces the earlier one. The JSON form is for migration 5,
+# which runs before report_request_members exists; later rebuilds join the table.
+_REQUESTED_FROM_JSON = '''
+    SELECT r.request_date, r.channel_id, u.value, r.channel_name
+    FROM bot_report_requests r, json_each(r.requested_users) u
+    WHERE r.id = (
+        SELECT MAX(id) FROM bot_report_requests
+        WHERE request_date = r.request_date AND channel_id = r.channel_id
+    )
+    GROUP BY r.request_date, r.channel_id, u.value
+'''
+_REQUESTED_FROM_MEMBERS = '''
+    SELECT m.request_date, m.channel_id, m.username, r.channel_name
+    FROM (
+        SELECT MAX(id) AS id FROM bot_report_requests
+        GROUP BY request_date, channel_id
+    ) latest
+    JOIN bot_report_requests r ON r.id = latest.id
+    JOIN report_request_members m ON m.request_id = latest.id
+'''
+
+def _rebuild_daily_stats(cursor, requested_query):
+    """Recompute daily_stats from daily_reports and the requested users `requested_query` selects."""
+    cursor.execute('DELETE FROM daily_stats')
+    cursor.execute(f'''
+        INSERT INTO daily_stats (report_date, channel_id, username, channel_name, requested, submitted)
+        SELECT *, 1, 0 FROM ({requested_query})
+    ''')
+    # WHERE true resolves the parsing ambiguity of INSERT ... SELECT ... ON CONFLICT
+    cursor.execute('''
+        INSERT INTO daily_stats (report_date, channel_id, username, channel_name, requested, submitted)
+        SELECT report_date, channel_id, username, MAX(channel_name), 0, COUNT(*)
+        FROM daily_reports WHERE true
+        GROUP BY report_date, channel_id, username
+        ON CONFLICT (report_date, channel_id, username)
+        DO UPDATE SET submitted = excluded.submitted
+    ''')
+
+def _migration_5_daily_stats(cursor):
+    # One row per (day, channel, user) that was requested or reported, so
+    # statistics never have to read message bodies or parse request JSON
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            report_date DATE NOT NULL,
+            channel_id TEXT NOT NULL,
+            username TEXT NOT NULL,
+            channel_name TEXT NOT NULL,
+            requested INTEGER NOT NULL DEFAULT 0,
+            submitted INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (report_date, channel_id, username)
+        ) WITHOUT ROWID
+    ''')
+    _rebuild_daily_stats(cursor, _REQUESTED_FROM_JSON)
+
+def _migration_6_change_counter(cursor):
+    # Bumped by triggers on every write to the report tables, whichever
+    # process or connection makes it; the web server's response cache keys on it
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS report_changes (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            changed_at TIMESTAMP NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO report_changes (id, version, changed_at)
+        VALUES (1, 0, CURRENT_TIMESTAMP)
+    ''')
+    for table in ('daily_reports', 'bot_report_requests'):
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_changed
+                AFTER {operation} ON {table}
+                BEGIN
+                    UPDATE report_changes SET version = version + 1, changed_at = CURRENT_TIMESTAMP
+                    WHERE id = 1;
+                END
+            ''')
+
+def _migration_7_report_search(cursor):
+    # External-content FTS5 index over daily_reports.message: the text is
+    # stored once, in daily_reports, and the triggers keep the index in step
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS daily_reports_fts USING fts5(
+            message,
+            content='daily_reports',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS daily_reports_fts_insert AFTER INSERT ON daily_reports
+        BEGIN
+            INSERT INTO daily_reports_fts (rowid, message) VALUES (new.id, new.message);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS daily_reports_fts_delete AFTER DELETE ON daily_reports
+        BEGIN
+            INSERT INTO daily_reports_fts (daily_reports_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS daily_reports_fts_update AFTER UPDATE OF message ON daily_reports
+        BEGIN
+            INSERT INTO daily_reports_fts (daily_reports_fts, rowid, message) VALUES ('delete', old.id, old.message);
+            INSERT INTO daily_reports_fts (rowid, message) VALUES (new.id, new.message);
+        END
+    ''')
+    # Backfill from the existing reports
+    cursor.execute("INSERT INTO daily_reports_fts (daily_reports_fts) VALUES ('rebuild')")
+
+def _migration_8_request_members(cursor):
+    # One row per requested user, so expected-vs-submitted can be joined in
+    # SQL instead of decoding bot_report_requests.requested_users
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS report_request_members (
+            request_id INTEGER NOT NULL,
+            channel_id TEXT NOT NULL,
+            request_date DATE NOT NULL,
+            username TEXT NOT NULL,
+            PRIMARY KEY (request_id, username)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_report_request_members_date_channel_user
+        ON report_request_members (request_date, channel_id, username)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_report_request_members_user_date
+        ON report_request_members (username, request_date)
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS bot_report_requests_members_delete AFTER DELETE ON bot_report_requests
+        BEGIN
+            DELETE FROM report_request_members WHERE request_id = old.id;
+        END
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO report_request_members (request_id, channel_id, request_date, username)
+        SELECT r.id, r.channel_id, r.request_date, u.value
+        FROM bot_report_requests r, json_each(r.requested_users) u
+    ''')
+    cursor.execute('ANALYZE report_request_members')
+
+# Schema migrations, applied in order. PRAGMA user_version stores how many
+# have run, so only append to this list; never edit or reorder entries.
+MIGRATIONS = [
+    _migration_1_base_tables,
+    _migration_2_lookup_indexes,
+    _migration_3_verdict_cache,
+    _migration_4_dm_channels,
+    _migration_5_daily_stats,
+    _migration_6_change_counter,
+    _migration_7_report_search,
+    _migration_8_request_members,
+]
+
+# group_by value -> SQL expression over daily_stats that names the bucket.
+# Weeks are keyed by their Monday.
+STATS_GROUPINGS = {
+    'day': 'report_date',
+    'week': "date(report_date, 'weekday 0', '-6 days')",
+    'month': "strftime('%Y-%m', report_date)",
+    'user': 'username',
+    'channel': 'channel_id',
+}
+
+# Columns the dashboard's reports table may be sorted by
+TABLE_ORDER_COLUMNS = ('report_date', 'username', 'channel_name')
+
+def build_match_query(query):
+    """Turn free text into an FTS5 MATCH expression that cannot be a syntax error.
+
+    Each word becomes a quoted phrase (so "JAR-123" matches the adjacent
+    tokens jar and 123), a trailing * is kept as a prefix match, and the
+    phrases are ANDed together.
+    """
+    phrases = []
+    for word in query.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            phrases.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' '.join(phrases)
+
 class Database:
-    def __init__(self):
-        self.db_path = DB_PATH
+    def __init__(self, db_path=None, read_only=False):
+        """Open a database, applying pending migrations first.
+
+        Args:
+            db_path (str, optional): SQLite file. Defaults to DB_PATH.
+            read_only (bool, optional): Open every connection with mode=ro and
+                query_only, for processes that only read (the web viewer).
+                Migrations still run once, on a short-lived writable
+                connection. Defaults to False.
+        """
+        self.db_path = db_path or DB_PATH
+        self.read_only = read_only
+        # One long-lived connection per thread: sqlite3 connections must not be
+        # shared across threads, and WAL lets each of them read while another writes.
+        self._local = threading.local()
         self._init_db()
 
+    def get_connection(self):
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, timeout=DB_BUSY_TIMEOUT / 1000)
+                conn.execute('PRAGMA query_only=ON')
+            else:
+                conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT / 1000)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT)}')
+            conn.execute(f'PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}')
+            conn.execute(f'PRAGMA mmap_size={int(DB_MMAP_SIZE)}')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            self._local.conn = conn
+        return conn
+
+    def get_schema_version(self):
+        """Return (applied, expected) migration counts."""
+        applied = self.get_connection().execute('PRAGMA user_version').fetchone()[0]
+        return applied, len(MIGRATIONS)
+
+    def close(self):
+        """Close the calling thread's connection, if it has one."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
     def _init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS daily_reports (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    channel_id TEXT NOT NULL,
-                    channel_name TEXT NOT NULL,
-                    username TEXT NOT NULL,
-                    report_date DATE NOT NULL,
-                    message TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bot_report_requests (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    channel_id TEXT NOT NULL,
-                    channel_name TEXT NOT NULL,
-                    request_date DATE NOT NULL,
-                    requested_users TEXT NOT NULL,  -- JSON array of usernames
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
+        """Bring the schema up to date by applying any pending MIGRATIONS."""
+        if self.read_only:
+            # Migrate through a writable instance that is dropped afterwards
+            writable = Database(self.db_path)
+            writable.close()
+            return
+        conn = self.get_connection()
+        for version, migration in enumerate(MIGRATIONS, start=1):
+            if conn.execute('PRAGMA user_version').fetchone()[0] >= version:
+                continue
+            # BEGIN IMMEDIATE serializes concurrent upgrades (bot and web
+            # server starting together); re-check the version once we hold the lock.
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if conn.execute('PRAGMA user_version').fetchone()[0] < version:
+                    logger.info("Migrating database %s to schema version %s", self.db_path, version)
+                    migration(conn.cursor())
+                    conn.execute(f'PRAGMA user_version = {version}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
     def add_report(self, channel_id, channel_name, username, message):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             today = datetime.now().date()
             cursor.execute('''
                 INSERT INTO daily_reports (channel_id, channel_name, username, report_date, message)
                 VALUES (?, ?, ?, ?, ?)
             ''', (channel_id, channel_name, username, today, message))
-            conn.commit()
+            cursor.execute('''
+                INSERT INTO daily_stats (report_date, channel_id, username, channel_name, requested, submitted)
+                VALUES (?, ?, ?, ?, 0, 1)
+                ON CONFLICT (report_date, channel_id, username)
+                DO UPDATE SET submitted = submitted + 1
+            ''', (today, channel_id, username, channel_name))
 
     def add_bot_request(self, channel_id, channel_name, requested_users):
         """Record when the bot requests reports from users in a channel."""
-        with sqlite3.connect(self.db_path) as conn:
+        self.add_bot_requests([(channel_id, channel_name, requested_users)])
+
+    def add_bot_requests(self, requests):
+        """Record several (channel_id, channel_name, requested_users) requests in one transaction."""
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             today = datetime.now().date()
-            # Convert list of usernames to JSON string
-            users_json = json.dumps(requested_users)
-            cursor.execute('''
-                INSERT INTO bot_report_requests (channel_id, channel_name, request_date, requested_users)
+            members = []
+            for channel_id, channel_name, requested_users in requests:
+                # The JSON column is kept for older readers; rebuild_daily_stats reads report_request_members
+                cursor.execute('''
+                    INSERT INTO bot_report_requests (channel_id, channel_name, request_date, requested_users)
+                    VALUES (?, ?, ?, ?)
+                ''', (channel_id, channel_name, today, json.dumps(requested_users)))
+                members.extend(
+                    (cursor.lastrowid, channel_id, today, username) for username in requested_users
+                )
+            cursor.executemany('''
+                INSERT OR IGNORE INTO report_request_members (request_id, channel_id, request_date, username)
                 VALUES (?, ?, ?, ?)
-            ''', (channel_id, channel_name, today, users_json))
-            conn.commit()
+            ''', members)
+            # Keep daily_stats in step: a new request for a channel replaces
+            # that day's earlier one, as in the monthly statistics
+            cursor.executemany('''
+                UPDATE daily_stats SET requested = 0
+                WHERE report_date = ? AND channel_id = ?
+            ''', [(today, channel_id) for channel_id, _, _ in requests])
+            cursor.executemany('''
+                INSERT INTO daily_stats (report_date, channel_id, username, channel_name, requested, submitted)
+                VALUES (?, ?, ?, ?, 1, 0)
+                ON CONFLICT (report_date, channel_id, username)
+                DO UPDATE SET requested = 1, channel_name = excluded.channel_name
+            ''', [
+                (today, channel_id, username, channel_name)
+                for channel_id, channel_name, requested_users in requests
+                for username in set(requested_users)
+            ])
 
     def get_today_reports(self, channel_id):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             today = datetime.now().date()
             cursor.execute('''
@@ -68,12 +399,415 @@ class Database:
             ''', (channel_id, today))
             return [row[0] for row in cursor.fetchall()]
 
+    def get_today_reporters(self):
+        """Return {channel_id: set(usernames)} for every report stored today."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            today = datetime.now().date()
+            cursor.execute('''
+                SELECT channel_id, username FROM daily_reports
+                WHERE report_date = ?
+            ''', (today,))
+            reporters = {}
+            for channel_id, username in cursor.fetchall():
+                reporters.setdefault(channel_id, set()).add(username)
+            return reporters
+
     def has_reported_today(self, channel_id, username):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             today = datetime.now().date()
             cursor.execute('''
                 SELECT COUNT(*) FROM daily_reports
                 WHERE channel_id = ? AND username = ? AND report_date = ?
             ''', (channel_id, username, today))
-            return cursor.fetchone()[0] > 0 
\ No newline at end of file
+            return cursor.fetchone()[0] > 0
+
+    @staticmethod
+    def _get_channel_names(cursor, start_date, end_date):
+        # Channels are shown under the name of their latest request
+        # (SQLite takes bare columns from the MAX() row)
+        cursor.execute('''
+            SELECT channel_id, channel_name, MAX(report_date) FROM daily_stats
+            WHERE report_date BETWEEN ? AND ? AND requested
+            GROUP BY channel_id
+        ''', (start_date, end_date))
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
+    def get_stats_series(self, start_date, end_date, group_by):
+        """Aggregate the daily_stats rollup over a date range in one indexed pass.
+
+        Args:
+            start_date (str): First day, YYYY-MM-DD
+            end_date (str): Last day, YYYY-MM-DD
+            group_by (str): One of STATS_GROUPINGS
+
+        Returns:
+            List[tuple]: (key, label, expected, submitted, reports) rows ordered by key, where
+            submitted counts requested days with a report and reports counts every report
+        """
+        key = STATS_GROUPINGS[group_by]
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {key} AS bucket,
+                       SUM(requested),
+                       SUM(requested AND submitted > 0),
+                       SUM(submitted)
+                FROM daily_stats
+                WHERE report_date BETWEEN ? AND ?
+                GROUP BY bucket
+                ORDER BY bucket
+            ''', (start_date, end_date))
+            rows = cursor.fetchall()
+            labels = self._get_channel_names(cursor, start_date, end_date) if group_by == 'channel' else {}
+            return [
+                (bucket, labels.get(bucket, bucket), expected, submitted, reports)
+                for bucket, expected, submitted, reports in rows
+            ]
+
+    def get_reports_page(self, start_date, end_date, date=None, username=None, channel_name=None,
+                         limit=None, before=None, include_messages=True):
+        """Return reports newest first, filtered and paginated in SQL.
+
+        Pagination is keyset-based: pass the (report_date, id) of the last
+        row of a page as `before` to get the next one, so deep pages cost
+        the same as the first.
+
+        Args:
+            start_date (str): First day, YYYY-MM-DD
+            end_date (str): Last day, YYYY-MM-DD
+            date (str, optional): Only reports from this day. Defaults to None.
+            username (str, optional): Only this user's reports. Defaults to None.
+            channel_name (str, optional): Only reports in this channel. Defaults to None.
+            limit (int, optional): Maximum rows to return; None for all. Defaults to None.
+            before (tuple, optional): (report_date, id) to continue after. Defaults to None.
+            include_messages (bool, optional): Select message bodies. Defaults to True.
+
+        Returns:
+            List[tuple]: (id, username, report_date, channel_id, channel_name[, message]) rows
+        """
+        conditions = ['report_date BETWEEN ? AND ?']
+        params = [start_date, end_date]
+        for column, value in (('report_date', date), ('username', username), ('channel_name', channel_name)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if before is not None:
+            conditions.append('(report_date, id) < (?, ?)')
+            params.extend(before)
+        columns = 'id, username, report_date, channel_id, channel_name'
+        if include_messages:
+            columns += ', message'
+        query = f'''
+            SELECT {columns} FROM daily_reports
+            WHERE {' AND '.join(conditions)}
+            ORDER BY report_date DESC, id DESC
+        '''
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    def get_reports_table(self, start_date, end_date, date=None, username=None, channel_name=None,
+                          search=None, order_by='report_date', descending=True, offset=0, limit=25):
+        """Return one page of report rows for a server-side table, without message bodies.
+
+        Args:
+            start_date (str): First day, YYYY-MM-DD
+            end_date (str): Last day, YYYY-MM-DD
+            date (str, optional): Only reports from this day. Defaults to None.
+            username (str, optional): Only this user's reports. Defaults to None.
+            channel_name (str, optional): Only reports in this channel. Defaults to None.
+            search (str, optional): Keep reports whose message contains every word (as
+                a prefix), or whose user or channel contains the text. Defaults to None.
+            order_by (str, optional): One of TABLE_ORDER_COLUMNS. Defaults to 'report_date'.
+            descending (bool, optional): Sort direction. Defaults to True.
+            offset (int, optional): Rows to skip. Defaults to 0.
+            limit (int, optional): Rows to return. Defaults to 25.
+
+        Returns:
+            Tuple[int, int, List[tuple]]: Count before search, count after search, and
+            (id, username, report_date, channel_id, channel_name) rows
+        """
+        if order_by not in TABLE_ORDER_COLUMNS:
+            raise ValueError(f"Cannot order by {order_by}")
+        conditions = ['report_date BETWEEN ? AND ?']
+        params = [start_date, end_date]
+        for column, value in (('report_date', date), ('username', username), ('channel_name', channel_name)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        base_where = ' AND '.join(conditions)
+        base_params = list(params)
+
+        search = (search or '').strip()
+        if search:
+            like = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            matches = [r"username LIKE ? ESCAPE '\'", r"channel_name LIKE ? ESCAPE '\'"]
+            params.extend([like, like])
+            # Every word as a prefix, so the table narrows down while the user types
+            match = build_match_query(' '.join(word.rstrip('*') + '*' for word in search.split()))
+            if match:
+                matches.append('id IN (SELECT rowid FROM daily_reports_fts WHERE daily_reports_fts MATCH ?)')
+                params.append(match)
+            conditions.append(f"({' OR '.join(matches)})")
+        where = ' AND '.join(conditions)
+
+        direction = 'DESC' if descending else 'ASC'
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT COUNT(*) FROM daily_reports WHERE {base_where}', base_params)
+            total = cursor.fetchone()[0]
+            if search:
+                cursor.execute(f'SELECT COUNT(*) FROM daily_reports WHERE {where}', params)
+                filtered = cursor.fetchone()[0]
+            else:
+                filtered = total
+            cursor.execute(f'''
+                SELECT id, username, report_date, channel_id, channel_name
+                FROM daily_reports
+                WHERE {where}
+                ORDER BY {order_by} {direction}, id {direction}
+                LIMIT ? OFFSET ?
+            ''', params + [limit, offset])
+            return total, filtered, cursor.fetchall()
+
+    def get_report(self, report_id):
+        """Return (id, username, report_date, channel_id, channel_name, message) or None."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, username, report_date, channel_id, channel_name, message
+                FROM daily_reports WHERE id = ?
+            ''', (report_id,))
+            return cursor.fetchone()
+
+    def iter_reports(self, start_date, end_date, username=None, channel_name=None, batch_size=500):
+        """Yield full report rows oldest first, fetching `batch_size` rows at a time.
+
+        Rows are read from an open cursor as the caller consumes them, so
+        memory use does not grow with the size of the range.
+
+        Yields:
+            tuple: (id, report_date, username, channel_id, channel_name, message, created_at)
+        """
+        conditions = ['report_date BETWEEN ? AND ?']
+        params = [start_date, end_date]
+        for column, value in (('username', username), ('channel_name', channel_name)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+
+        cursor = self.get_connection().cursor()
+        try:
+            cursor.execute(f'''
+                SELECT id, report_date, username, channel_id, channel_name, message, created_at
+                FROM daily_reports
+                WHERE {' AND '.join(conditions)}
+                ORDER BY report_date, id
+            ''', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def search_reports(self, query, start_date=None, end_date=None, username=None, channel_name=None,
+                       limit=50, highlight=('[', ']')):
+        """Full-text search over report messages, best matches first.
+
+        Every word of `query` must appear in the report; a trailing * makes
+        a word a prefix match (e.g. "deploy*"). Punctuation splits words the
+        way the index does, so "JAR-123" finds the ticket as written.
+
+        Args:
+            query (str): Words to search for
+            start_date (str, optional): First day, YYYY-MM-DD. Defaults to None.
+            end_date (str, optional): Last day, YYYY-MM-DD. Defaults to None.
+            username (str, optional): Only this user's reports. Defaults to None.
+            channel_name (str, optional): Only reports in this channel. Defaults to None.
+            limit (int, optional): Maximum results. Defaults to 50.
+            highlight (tuple, optional): Markers placed around matches in the snippet. Defaults to ('[', ']').
+
+        Returns:
+            List[tuple]: (id, report_date, username, channel_id, channel_name, snippet, rank) rows,
+            where a lower rank is a better match
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        conditions = ['daily_reports_fts MATCH ?']
+        params = [highlight[0], highlight[1], match]
+        for condition, value in (('r.report_date >= ?', start_date), ('r.report_date <= ?', end_date),
+                                 ('r.username = ?', username), ('r.channel_name = ?', channel_name)):
+            if value:
+                conditions.append(condition)
+                params.append(value)
+        params.append(limit)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT r.id, r.report_date, r.username, r.channel_id, r.channel_name,
+                       snippet(daily_reports_fts, 0, ?, ?, '…', 16),
+                       bm25(daily_reports_fts) AS rank
+                FROM daily_reports_fts
+                JOIN daily_reports r ON r.id = daily_reports_fts.rowid
+                WHERE {' AND '.join(conditions)}
+                ORDER BY rank
+                LIMIT ?
+            ''', params)
+            return cursor.fetchall()
+
+    def get_filter_values(self, start_date, end_date):
+        """Return (channel_names, usernames) that had report requests in the range, sorted."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT DISTINCT channel_name FROM daily_stats
+                WHERE report_date BETWEEN ? AND ? AND requested
+                ORDER BY channel_name
+            ''', (start_date, end_date))
+            channel_names = [row[0] for row in cursor.fetchall()]
+            cursor.execute('''
+                SELECT DISTINCT username FROM daily_stats
+                WHERE report_date BETWEEN ? AND ? AND requested
+                ORDER BY username
+            ''', (start_date, end_date))
+            usernames = [row[0] for row in cursor.fetchall()]
+            return channel_names, usernames
+
+    def get_change_token(self):
+        """Return (version, changed_at UTC string) of the last write to the report tables."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT version, changed_at FROM report_changes WHERE id = 1')
+            return cursor.fetchone()
+
+    def rebuild_daily_stats(self):
+        """Recompute the daily_stats rollup from scratch, e.g. after editing reports by hand."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            _rebuild_daily_stats(cursor, _REQUESTED_FROM_MEMBERS)
+            # Statistics may have changed without a write to the report tables
+            cursor.execute('''
+                UPDATE report_changes SET version = version + 1, changed_at = CURRENT_TIMESTAMP
+                WHERE id = 1
+            ''')
+
+    def get_daily_stats(self, start_date, end_date, date=None, username=None, channel_name=None):
+        """Return per-user, per-channel totals from the daily_stats rollup.
+
+        Only (channel, user) pairs with at least one request in the range are
+        returned. A report counts as submitted only on a day the user was
+        requested in that channel, and at most once per day. The optional
+        filters restrict which submitted reports are counted, not which requests.
+
+        Args:
+            start_date (str): First day, YYYY-MM-DD
+            end_date (str): Last day, YYYY-MM-DD
+            date (str, optional): Count only reports from this day. Defaults to None.
+            username (str, optional): Count only this user's reports. Defaults to None.
+            channel_name (str, optional): Count only reports in this channel. Defaults to None.
+
+        Returns:
+            List[tuple]: (username, channel_id, channel_name, requested, submitted) rows
+        """
+        conditions = ['requested']
+        params = []
+        for column, value in (('report_date', date), ('username', username), ('channel_name', channel_name)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        submitted = f"CASE WHEN {' AND '.join(conditions)} THEN MIN(submitted, 1) ELSE 0 END"
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            channel_names = self._get_channel_names(cursor, start_date, end_date)
+
+            cursor.execute(f'''
+                SELECT username, channel_id, SUM(requested), SUM({submitted})
+                FROM daily_stats
+                WHERE report_date BETWEEN ? AND ?
+                GROUP BY channel_id, username
+                HAVING SUM(requested) > 0
+            ''', params + [start_date, end_date])
+            return [
+                (username, channel_id, channel_names[channel_id], requested, submitted)
+                for username, channel_id, requested, submitted in cursor.fetchall()
+            ]
+
+
+    def get_cached_verdict(self, cache_key, now):
+        """Return (expires_at, verdict) for an unexpired cached AI verdict, or None."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT expires_at, valid, message FROM ai_verdict_cache
+                WHERE cache_key = ? AND expires_at > ?
+            ''', (cache_key, now))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return row[0], {"valid": bool(row[1]), "message": row[2]}
+
+    def store_cached_verdict(self, cache_key, expires_at, verdict):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO ai_verdict_cache (cache_key, valid, message, expires_at)
+                VALUES (?, ?, ?, ?)
+            ''', (cache_key, int(bool(verdict["valid"])), verdict["message"], expires_at))
+
+    def prune_cached_verdicts(self, now, max_entries):
+        """Drop expired verdicts, then the oldest ones beyond max_entries."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM ai_verdict_cache WHERE expires_at <= ?', (now,))
+            cursor.execute('''
+                DELETE FROM ai_verdict_cache WHERE cache_key IN (
+                    SELECT cache_key FROM ai_verdict_cache
+                    ORDER BY expires_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (max_entries,))
+
+
+    def get_dm_channels(self):
+        """Return {username: (user_id, channel_id)} for every cached DM channel."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT username, user_id, channel_id FROM dm_channels')
+            return {username: (user_id, channel_id) for username, user_id, channel_id in cursor.fetchall()}
+
+    def store_dm_channel(self, username, user_id, channel_id):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO dm_channels (username, user_id, channel_id, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (username, user_id, channel_id))
+
+    def delete_dm_channel(self, username):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM dm_channels WHERE username = ?', (username,))
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+def get_database(db_path=None, read_only=False):
+    """Return a process-wide shared Database for the given path and mode."""
+    key = (db_path or DB_PATH, read_only)
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = Database(key[0], read_only=read_only)
+        return _databases[key]
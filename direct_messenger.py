@@ -0,0 +1,97 @@
+import queue
+from threading import Lock, Thread
+from typing import Optional
+
+from mattermostdriver.exceptions import NotEnoughPermissions, ResourceNotFound
+
+from bot_logging import get_logger
+
+logger = get_logger('dm')
+
+
+class DirectMessenger:
+    def __init__(self, driver, database, users, dispatcher):
+        """Queue and send direct messages from the bot, caching DM channels.
+
+        The username -> user_id -> DM channel id mapping never changes for a
+        user, so it is kept in memory and in the dm_channels table. After the
+        first message to a user, every later one costs a single POST, even
+        across restarts.
+
+        Args:
+            driver: Logged-in mattermostdriver.Driver instance
+            database (Database): Stores the DM channel cache
+            users (UserDirectory): Resolves usernames to user IDs
+            dispatcher (PostDispatcher): Rate-limited sender for the posts
+        """
+        self.driver = driver
+        self.database = database
+        self.users = users
+        self.dispatcher = dispatcher
+        self.bot_id = None
+        self._channels = {}  # Format: {username: (user_id, channel_id)}
+        self._lock = Lock()
+        self._queue = queue.Queue()
+
+    def start(self, bot_id: str):
+        self.bot_id = bot_id
+        with self._lock:
+            self._channels = self.database.get_dm_channels()
+        logger.info("Loaded %s cached DM channels", len(self._channels))
+        thread = Thread(target=self._run, name="direct-messenger")
+        thread.daemon = True
+        thread.start()
+
+    def send(self, username: str, message: str):
+        """Queue a direct message to a user. Returns immediately."""
+        self._queue.put((username, message))
+
+    def join(self):
+        """Block until every queued message has been sent or has failed."""
+        self._queue.join()
+
+    def get_channel_id(self, username: str) -> Optional[str]:
+        with self._lock:
+            cached = self._channels.get(username)
+        if cached is not None:
+            return cached[1]
+
+        user_id = self.users.get_user_id(username)
+        if user_id is None:
+            return None
+        channel = self.driver.channels.create_direct_message_channel([self.bot_id, user_id])
+        with self._lock:
+            self._channels[username] = (user_id, channel['id'])
+        self.database.store_dm_channel(username, user_id, channel['id'])
+        return channel['id']
+
+    def forget(self, username: str):
+        with self._lock:
+            self._channels.pop(username, None)
+        self.database.delete_dm_channel(username)
+
+    def _deliver(self, username: str, message: str):
+        channel_id = self.get_channel_id(username)
+        if channel_id is None:
+            logger.info("Cannot send DM to %s: unknown user", username)
+            return
+        try:
+            self.dispatcher.create_post({'channel_id': channel_id, 'message': message})
+        except (ResourceNotFound, NotEnoughPermissions):
+            # The cached channel is gone (user deleted and recreated, channel
+            # archived); resolve it again once
+            logger.info("Cached DM channel for %s is stale, recreating it", username)
+            self.forget(username)
+            channel_id = self.get_channel_id(username)
+            if channel_id is not None:
+                self.dispatcher.create_post({'channel_id': channel_id, 'message': message})
+
+    def _run(self):
+        while True:
+            username, message = self._queue.get()
+            try:
+                self._deliver(username, message)
+            except Exception as e:
+                logger.error("Error sending DM to %s: %s", username, e, exc_info=True)
+            finally:
+                self._queue.task_done()
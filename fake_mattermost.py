@@ -0,0 +1,431 @@
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import random
+import re
+import struct
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Not bot_logging: that reads config, and the fakes must start before the
+# bot's configuration is pointed at them. Output appears once the bot configures logging.
+logger = logging.getLogger('scrumbot.fake_mattermost')
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+# "### Report N" sections of a batched validation prompt (see AIValidator.validate_batch)
+BATCH_REPORT_PATTERN = re.compile(r'^### Report (\d+)\n(.*?)(?=\n\n### Report \d+\n|\n\nReturn a JSON array)',
+                                  re.MULTILINE | re.DOTALL)
+SINGLE_REPORT_PATTERN = re.compile(r'User message to analyze:\n(.*?)\n\s*Return your analysis', re.DOTALL)
+
+
+def new_id() -> str:
+    """Return a 26-character id shaped like Mattermost's."""
+    return uuid.uuid4().hex[:26]
+
+
+class _JsonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real servers
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def send_json(self, status: int, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeMattermost:
+    def __init__(self, bot_user: dict, users: List[dict], teams: List[dict], channels: List[dict],
+                 members: Dict[str, List[str]], api_latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        """Stand-in for the Mattermost REST and websocket APIs used by ScrumBot.
+
+        Serves just the endpoints mattermostdriver.Driver calls for the bot
+        (login, teams, channels, members, users, posts, direct channels) and
+        the /api/v4/websocket endpoint. Every created post is recorded with
+        its arrival time and broadcast as a "posted" event, as the real
+        server does.
+
+        Args:
+            bot_user (dict): {'id', 'username'} of the bot account
+            users (List[dict]): {'id', 'username'} of every other user
+            teams (List[dict]): {'id', 'name', 'display_name'} teams the bot belongs to
+            channels (List[dict]): {'id', 'team_id', 'name', 'display_name', 'type'} channels the bot is in
+            members (Dict[str, List[str]]): User ids in each channel, bot included
+            api_latency (float, optional): Seconds added to every REST response. Defaults to 0.0.
+            host (str, optional): Address to listen on. Defaults to '127.0.0.1'.
+            port (int, optional): Port to listen on; 0 picks a free one. Defaults to 0.
+        """
+        self.bot_user = bot_user
+        self.users = {user['id']: user for user in [bot_user] + list(users)}
+        self.users_by_name = {user['username']: user for user in self.users.values()}
+        self.teams = {team['id']: team for team in teams}
+        self.channels = {channel['id']: channel for channel in channels}
+        self.members = members
+        self.api_latency = api_latency
+
+        self.posts = []  # Format: [{'id', 'user_id', 'channel_id', 'root_id', 'message', 'received_at'}]
+        self.direct_channels = {}  # Format: {frozenset(user_ids): channel_id}
+        self.request_counts = {}  # Format: {route: requests served}
+        self.websocket_connected_at = None
+        self._websocket_ready = Event()
+        self._sockets = []
+        self._seq = itertools.count(1)
+        self._lock = Lock()
+
+        self._routes = [
+            ('GET', re.compile(r'/api/v4/users/me$'), self._get_me),
+            ('GET', re.compile(r'/api/v4/users/me/teams/members$'), self._get_team_members),
+            ('GET', re.compile(r'/api/v4/teams/(\w+)$'), self._get_team),
+            ('GET', re.compile(r'/api/v4/users/me/teams/(\w+)/channels$'), self._get_team_channels),
+            ('GET', re.compile(r'/api/v4/channels/(\w+)/members$'), self._get_channel_members),
+            ('GET', re.compile(r'/api/v4/channels/(\w+)$'), self._get_channel),
+            ('POST', re.compile(r'/api/v4/users/ids$'), self._get_users_by_ids),
+            ('POST', re.compile(r'/api/v4/users/usernames$'), self._get_users_by_usernames),
+            ('POST', re.compile(r'/api/v4/channels/direct$'), self._create_direct_channel),
+            ('POST', re.compile(r'/api/v4/posts$'), self._create_post),
+        ]
+        self._server = _JsonServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = Thread(target=self._server.serve_forever, name='fake-mattermost')
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info("Fake Mattermost listening on %s", self.url)
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def wait_for_websocket(self, timeout: Optional[float] = None) -> bool:
+        """Block until a client has authenticated on the websocket."""
+        return self._websocket_ready.wait(timeout)
+
+    def emit_post(self, user_id: str, channel_id: str, message: str, root_id: str = '') -> dict:
+        """Post as a user: record the post and broadcast it to websocket clients."""
+        return self._store_post(user_id, channel_id, message, root_id)
+
+    def posts_since(self, index: int) -> List[dict]:
+        with self._lock:
+            return list(self.posts[index:])
+
+    def _store_post(self, user_id, channel_id, message, root_id):
+        now_ms = int(time.time() * 1000)
+        post = {
+            'id': new_id(),
+            'create_at': now_ms,
+            'update_at': now_ms,
+            'user_id': user_id,
+            'channel_id': channel_id,
+            'root_id': root_id or '',
+            'message': message,
+            'type': '',
+            'props': {},
+        }
+        with self._lock:
+            self.posts.append(dict(post, received_at=time.monotonic()))
+        self._broadcast_posted(post)
+        return post
+
+    def _broadcast_posted(self, post):
+        channel = self.channels.get(post['channel_id'], {})
+        sender = self.users.get(post['user_id'], {})
+        event = {
+            'event': 'posted',
+            'data': {
+                'channel_display_name': channel.get('display_name', ''),
+                'channel_name': channel.get('name', ''),
+                'channel_type': channel.get('type', 'D'),
+                # Mattermost sends the post as a compact JSON string inside the event
+                'post': json.dumps(post, separators=(',', ':')),
+                'sender_name': '@' + sender.get('username', ''),
+                'team_id': channel.get('team_id', ''),
+            },
+            'broadcast': {'omit_users': None, 'user_id': '', 'channel_id': post['channel_id'], 'team_id': ''},
+        }
+        with self._lock:
+            sockets = list(self._sockets)
+        for socket in sockets:
+            socket.send_event(event)
+
+    # REST endpoints. Each returns (status, body).
+
+    def _get_me(self, request):
+        return 200, self.bot_user
+
+    def _get_team_members(self, request):
+        return 200, [{'team_id': team_id, 'user_id': self.bot_user['id']} for team_id in self.teams]
+
+    def _get_team(self, request, team_id):
+        team = self.teams.get(team_id)
+        return (200, team) if team else self._not_found('team')
+
+    def _get_team_channels(self, request, team_id):
+        return 200, [channel for channel in self.channels.values() if channel.get('team_id') == team_id]
+
+    def _get_channel(self, request, channel_id):
+        channel = self.channels.get(channel_id)
+        return (200, channel) if channel else self._not_found('channel')
+
+    def _get_channel_members(self, request, channel_id):
+        if channel_id not in self.channels:
+            return self._not_found('channel')
+        params = parse_qs(urlparse(request.path).query)
+        page = int(params.get('page', ['0'])[0])
+        per_page = int(params.get('per_page', ['60'])[0])
+        member_ids = self.members.get(channel_id, [])[page * per_page:(page + 1) * per_page]
+        return 200, [{'channel_id': channel_id, 'user_id': user_id} for user_id in member_ids]
+
+    def _get_users_by_ids(self, request):
+        return 200, [self.users[user_id] for user_id in request.read_json() or [] if user_id in self.users]
+
+    def _get_users_by_usernames(self, request):
+        return 200, [self.users_by_name[name] for name in request.read_json() or [] if name in self.users_by_name]
+
+    def _create_direct_channel(self, request):
+        user_ids = request.read_json() or []
+        key = frozenset(user_ids)
+        with self._lock:
+            channel_id = self.direct_channels.setdefault(key, new_id())
+        return 201, {'id': channel_id, 'type': 'D', 'name': '__'.join(sorted(user_ids)), 'team_id': ''}
+
+    def _create_post(self, request):
+        options = request.read_json() or {}
+        post = self._store_post(self.bot_user['id'], options.get('channel_id', ''),
+                                options.get('message', ''), options.get('root_id', ''))
+        return 201, post
+
+    @staticmethod
+    def _not_found(kind):
+        return 404, {'id': 'api.context.404.app_error', 'message': f'Unable to find the {kind}.', 'status_code': 404}
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(_JsonHandler):
+            def do_GET(self):
+                if urlparse(self.path).path == '/api/v4/websocket':
+                    return _WebsocketConnection(fake, self).serve()
+                self._route('GET')
+
+            def do_POST(self):
+                self._route('POST')
+
+            def do_PUT(self):
+                self._route('PUT')
+
+            def _route(self, method):
+                path = urlparse(self.path).path
+                for route_method, pattern, endpoint in fake._routes:
+                    match = pattern.match(path)
+                    if route_method == method and match:
+                        with fake._lock:
+                            fake.request_counts[endpoint.__name__] = fake.request_counts.get(endpoint.__name__, 0) + 1
+                        if fake.api_latency:
+                            time.sleep(fake.api_latency)
+                        status, body = endpoint(self, *match.groups())
+                        return self.send_json(status, body)
+                self.send_json(*fake._not_found('route'))
+
+        return Handler
+
+
+class _WebsocketConnection:
+    def __init__(self, fake: FakeMattermost, handler: BaseHTTPRequestHandler):
+        """Minimal RFC 6455 server side of one websocket, enough for mattermostdriver.
+
+        Text frames, ping/pong and close are supported; fragmented frames are not.
+        """
+        self.fake = fake
+        self.handler = handler
+        self._write_lock = Lock()
+
+    def serve(self):
+        key = self.handler.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+        self.handler.send_response(101, 'Switching Protocols')
+        self.handler.send_header('Upgrade', 'websocket')
+        self.handler.send_header('Connection', 'Upgrade')
+        self.handler.send_header('Sec-WebSocket-Accept', accept)
+        self.handler.end_headers()
+        self.handler.wfile.flush()
+        self.handler.close_connection = True
+        try:
+            while True:
+                opcode, payload = self._read_frame()
+                if opcode == 0x8:  # Close
+                    self._write_frame(0x8, payload[:2])
+                    return
+                if opcode == 0x9:  # Ping
+                    self._write_frame(0xA, payload)
+                elif opcode == 0x1:
+                    self._on_message(json.loads(payload))
+        except (ConnectionError, EOFError, OSError):
+            pass
+        finally:
+            with self.fake._lock:
+                if self in self.fake._sockets:
+                    self.fake._sockets.remove(self)
+
+    def send_event(self, event: dict):
+        event = dict(event, seq=next(self.fake._seq))
+        try:
+            self._write_frame(0x1, json.dumps(event, separators=(',', ':')).encode('utf-8'))
+        except OSError:
+            pass
+
+    def _on_message(self, message):
+        if message.get('action') != 'authentication_challenge':
+            return
+        # Like Mattermost, say hello before answering the challenge
+        hello = {'event': 'hello', 'data': {'server_version': 'fake'},
+                 'broadcast': {'user_id': self.fake.bot_user['id']}, 'seq': 0}
+        self._write_frame(0x1, json.dumps(hello, separators=(',', ':')).encode('utf-8'))
+        self._write_frame(0x1, json.dumps({'status': 'OK', 'seq_reply': message.get('seq', 1)}).encode('utf-8'))
+        with self.fake._lock:
+            self.fake._sockets.append(self)
+            if self.fake.websocket_connected_at is None:
+                self.fake.websocket_connected_at = time.monotonic()
+        self.fake._websocket_ready.set()
+
+    def _read_exact(self, size):
+        data = self.handler.rfile.read(size)
+        if len(data) < size:
+            raise EOFError
+        return data
+
+    def _read_frame(self):
+        first, second = self._read_exact(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._read_exact(8))[0]
+        mask = self._read_exact(4) if second & 0x80 else None
+        payload = self._read_exact(length)
+        if mask:
+            payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+        return first & 0x0F, payload
+
+    def _write_frame(self, opcode, payload):
+        # Server frames are never masked
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 1 << 16:
+            header += bytes([126]) + struct.pack('!H', len(payload))
+        else:
+            header += bytes([127]) + struct.pack('!Q', len(payload))
+        with self._write_lock:
+            self.handler.wfile.write(header + payload)
+            self.handler.wfile.flush()
+
+
+class FakeChatCompletions:
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, host: str = '127.0.0.1', port: int = 0,
+                 seed: Optional[int] = None):
+        """Stub OpenAI-compatible /v1/chat/completions endpoint with configurable latency.
+
+        Answers the single-report and batched validation prompts of
+        AIValidator in the format it expects. A report counts as valid when
+        it has at least eight words.
+
+        Args:
+            latency (float, optional): Seconds before each response. Defaults to 0.5.
+            jitter (float, optional): Random extra seconds, up to this much. Defaults to 0.0.
+            host (str, optional): Address to listen on. Defaults to '127.0.0.1'.
+            port (int, optional): Port to listen on; 0 picks a free one. Defaults to 0.
+            seed (int, optional): Seed for the jitter. Defaults to None.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.reports = 0
+        self._lock = Lock()
+        self._server = _JsonServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self):
+        self._thread = Thread(target=self._server.serve_forever, name='fake-chat-completions')
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info("Fake chat completions endpoint at %s", self.base_url)
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _verdict(report_text):
+        if len(report_text.split()) >= 8:
+            return {'valid': True, 'message': 'Thanks for the update, **the report is accepted**!'}
+        return {'valid': False, 'message': 'Could you add what you did yesterday and what you plan today?'}
+
+    def _answer(self, prompt):
+        batch = BATCH_REPORT_PATTERN.findall(prompt)
+        if batch:
+            verdicts = [dict(self._verdict(text), index=int(index)) for index, text in batch]
+            return json.dumps(verdicts), len(verdicts)
+        match = SINGLE_REPORT_PATTERN.search(prompt)
+        return json.dumps(self._verdict(match.group(1).strip() if match else '')), 1
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(_JsonHandler):
+            def do_POST(self):
+                request = self.read_json() or {}
+                if not urlparse(self.path).path.endswith('/chat/completions'):
+                    return self.send_json(404, {'error': {'message': 'Not found'}})
+                with stub._lock:
+                    delay = stub.latency + (stub._random.uniform(0, stub.jitter) if stub.jitter else 0)
+                time.sleep(delay)
+                prompt = request.get('messages', [{}])[-1].get('content', '')
+                content, reports = stub._answer(prompt)
+                with stub._lock:
+                    stub.requests += 1
+                    stub.reports += reports
+                self.send_json(200, {
+                    'id': 'chatcmpl-' + new_id(),
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'fake'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': content},
+                        'finish_reason': 'stop',
+                    }],
+                    'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4,
+                              'total_tokens': (len(prompt) + len(content)) // 4},
+                })
+
+        return Handler
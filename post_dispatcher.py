@@ -0,0 +1,125 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import List, Union
+
+import requests
+
+from bot_logging import get_logger
+
+logger = get_logger('posts')
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """Classic token bucket: `rate` tokens per second, bursts up to `capacity`."""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for `seconds`, e.g. until the server's rate limit window resets."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class PostDispatcher:
+    def __init__(self, driver, rate: float = 10, burst: int = 10, concurrency: int = 8, max_retries: int = 5):
+        """Create Mattermost posts concurrently without tripping the server's rate limit.
+
+        Args:
+            driver: Logged-in mattermostdriver.Driver instance
+            rate (float, optional): Posts per second across all workers. Defaults to 10.
+            burst (int, optional): Posts that may be sent back to back. Defaults to 10.
+            concurrency (int, optional): Requests in flight at once. Defaults to 8.
+            max_retries (int, optional): Retries for 429, 5xx and connection errors. Defaults to 5.
+        """
+        self.driver = driver
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+
+    def create_post(self, options: dict) -> dict:
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                # make_request (unlike posts.create_post) returns the response,
+                # so the X-RateLimit-* headers are visible
+                response = self.driver.client.make_request('post', '/posts', options=options)
+                self._observe_rate_limit(response)
+                return response.json()
+            except requests.HTTPError as e:
+                response = e.response
+                if response is None or (response.status_code != 429 and response.status_code < 500):
+                    raise
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(response, attempt)
+                logger.info("Post rejected with HTTP %s, retrying in %.1fs", response.status_code, delay)
+                if response.status_code == 429:
+                    self.bucket.pause(delay)
+                time.sleep(delay)
+            except requests.ConnectionError:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.error("Connection error creating post, retrying in %.1fs", delay)
+                time.sleep(delay)
+
+    def create_posts(self, posts: List[dict]) -> List[Union[dict, Exception]]:
+        """Create many posts concurrently. Failed posts yield their exception, in order."""
+        def send(options):
+            try:
+                return self.create_post(options)
+            except Exception as e:
+                logger.error("Error creating post in channel %s: %s", options.get('channel_id'), e, exc_info=True)
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(send, posts))
+
+    def _observe_rate_limit(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is not None and reset is not None:
+            try:
+                if int(remaining) <= 0:
+                    self.bucket.pause(float(reset))
+            except ValueError:
+                pass
+
+    def _retry_delay(self, response, attempt: int) -> float:
+        for header in ('Retry-After', 'X-RateLimit-Reset'):
+            value = response.headers.get(header)
+            if value:
+                try:
+                    return float(value) + random.uniform(0, 0.5)
+                except ValueError:
+                    pass
+        return self._backoff(attempt)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        # Exponential backoff with full jitter, capped at 30 seconds
+        return random.uniform(0, min(30, 0.5 * 2 ** attempt))
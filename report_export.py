@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+# Export format -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'text': ('text/plain', 'txt'),
+}
+EXPORT_COLUMNS = ['id', 'date', 'username', 'channel_id', 'channel_name', 'message', 'created_at']
+# Rows rendered per yielded chunk: large enough for few writes, small enough to stream
+CHUNK_ROWS = 200
+
+
+def export_reports(rows: Iterable[tuple], export_format: str) -> Iterator[str]:
+    """Render report rows from Database.iter_reports as a stream of text chunks.
+
+    Args:
+        rows (Iterable[tuple]): Rows in EXPORT_COLUMNS order, consumed lazily
+        export_format (str): One of EXPORT_FORMATS
+
+    Yields:
+        str: Consecutive pieces of the export
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    render = {'csv': _render_csv, 'ndjson': _render_ndjson, 'text': _render_text}[export_format]
+    return render(rows)
+
+
+def _chunks(rows: Iterable[tuple]) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _render_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in _chunks(rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()  # Header only, when there are no rows
+
+
+def _render_ndjson(rows):
+    for chunk in _chunks(rows):
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n'
+            for row in chunk
+        )
+
+
+def _render_text(rows):
+    # Same layout as the detailed section of view_reports.display_reports
+    current_date = None
+    for chunk in _chunks(rows):
+        lines = []
+        for report_id, date, username, channel_id, channel_name, message, created_at in chunk:
+            if date != current_date:
+                lines.append(f"\n[{date}]")
+                current_date = date
+            lines.append(f"- {username} ({channel_name}):")
+            lines.extend(f"  {line}" for line in message.split('\n'))
+        yield '\n'.join(lines) + '\n'
@@ -0,0 +1,68 @@
+from datetime import date
+from threading import Lock
+from typing import Dict, Iterable, Set
+
+
+class ReportTracker:
+    """In-memory index of who has reported today and who is still pending.
+
+    The reminder loop reads this instead of querying the database, so a tick
+    costs O(pending users). It is rebuilt from the database at startup and
+    whenever a new daily report goes out, and updated as replies come in.
+    Reports are stored under the local date (as Database.add_report does),
+    so the reported sets are emptied when that date changes: a reply after
+    midnight in a thread that is still open counts for the new day.
+    """
+
+    def __init__(self):
+        self.day = date.today()  # Day the reported sets belong to
+        self.reported = {}  # Format: {channel_id: set(usernames)}
+        self.pending = {}  # Format: {username: set(channel_ids)}
+        self._lock = Lock()
+
+    def _roll_over(self):
+        # Caller holds the lock
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            self.reported = {}
+
+    def reset(self, reported: Dict[str, Iterable[str]]):
+        """Start a new day from the reporters already stored in the database."""
+        with self._lock:
+            self.day = date.today()
+            self.reported = {channel_id: set(usernames) for channel_id, usernames in reported.items()}
+            self.pending = {}
+
+    def add_request(self, channel_id: str, usernames: Iterable[str]):
+        """Mark users as expected to report in a channel, unless they already have."""
+        with self._lock:
+            self._roll_over()
+            reported = self.reported.get(channel_id, set())
+            for username in usernames:
+                if username not in reported:
+                    self.pending.setdefault(username, set()).add(channel_id)
+
+    def mark_reported(self, channel_id: str, username: str):
+        with self._lock:
+            self._roll_over()
+            self.reported.setdefault(channel_id, set()).add(username)
+            channels = self.pending.get(username)
+            if channels is not None:
+                channels.discard(channel_id)
+                if not channels:
+                    del self.pending[username]
+
+    def has_reported(self, channel_id: str, username: str) -> bool:
+        with self._lock:
+            self._roll_over()
+            return username in self.reported.get(channel_id, ())
+
+    def pending_channels(self, username: str) -> Set[str]:
+        with self._lock:
+            return set(self.pending.get(username, ()))
+
+    def pending_users(self) -> Dict[str, Set[str]]:
+        """Snapshot of {username: pending channel_ids}."""
+        with self._lock:
+            return {username: set(channels) for username, channels in self.pending.items()}
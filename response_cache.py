@@ -0,0 +1,73 @@
+import hashlib
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from functools import wraps
+from threading import Lock
+
+from flask import Response, request
+
+
+class ResponseCache:
+    def __init__(self, database, max_entries: int = 256):
+        """Cache of rendered API responses, revalidated against the database's change token.
+
+        Each response gets an ETag derived from the request and the token, and
+        the token's timestamp as Last-Modified. A client that sends back a
+        matching If-None-Match or If-Modified-Since gets a 304 without any
+        report query being run; other clients get the cached body until the
+        next write to the report tables.
+
+        Args:
+            database (Database): Provides get_change_token()
+            max_entries (int, optional): Responses kept in memory (LRU). Defaults to 256.
+        """
+        self.database = database
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # Format: {key: (etag, body)}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, view):
+        """Decorate a Flask view returning a JSON-serializable response."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, changed_at = self.database.get_change_token()
+            # Today's date is part of the key: defaults such as the current
+            # month change at midnight without any write
+            key = (request.path, tuple(sorted(request.args.items(multi=True))), date.today().isoformat())
+            etag = hashlib.sha1(repr((key, version)).encode('utf-8')).hexdigest()
+            last_modified = datetime.strptime(changed_at, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+            if etag in request.if_none_match:
+                return self._conditional(Response(status=304), etag, last_modified)
+
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == etag:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._conditional(
+                        Response(entry[1], mimetype='application/json'), etag, last_modified
+                    )
+                self.misses += 1
+
+            response = view(*args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != 200:
+                return response  # Errors are not cached
+            body = response.get_data()
+            with self._lock:
+                self._entries[key] = (etag, body)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return self._conditional(response, etag, last_modified)
+        return wrapper
+
+    @staticmethod
+    def _conditional(response, etag, last_modified):
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        # Let browsers keep the body but revalidate on every load
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
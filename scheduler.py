@@ -0,0 +1,94 @@
+import heapq
+import itertools
+from datetime import datetime
+from threading import Condition
+from typing import Callable, Hashable, Optional
+
+from bot_logging import get_logger
+
+logger = get_logger('scheduler')
+
+# Upper bound on a single sleep, so a wall-clock jump (NTP sync, VM resume)
+# delays a job by at most this long.
+MAX_SLEEP_SECONDS = 300
+
+
+class DeadlineScheduler:
+    """Run callbacks at wall-clock deadlines from a single thread.
+
+    Jobs are kept in a heap ordered by deadline and identified by a key, so
+    scheduling a key again replaces its previous deadline. The run loop
+    sleeps until the earliest deadline and is woken early whenever a job is
+    added or cancelled.
+    """
+
+    def __init__(self, tz):
+        self.tz = tz
+        self._heap = []  # Format: [(deadline, seq, key)]
+        self._jobs = {}  # Format: {key: (seq, deadline, callback)}
+        self._counter = itertools.count()
+        self._condition = Condition()
+        self._running = False
+
+    def schedule(self, key: Hashable, when: datetime, callback: Callable[[], None]):
+        """Run callback at `when`, replacing any job already scheduled under key."""
+        with self._condition:
+            seq = next(self._counter)
+            self._jobs[key] = (seq, when, callback)
+            heapq.heappush(self._heap, (when, seq, key))
+            self._condition.notify()
+
+    def cancel(self, key: Hashable):
+        with self._condition:
+            # The heap entry is dropped lazily when it reaches the top
+            if self._jobs.pop(key, None) is not None:
+                self._condition.notify()
+
+    def next_run(self, key: Hashable) -> Optional[datetime]:
+        with self._condition:
+            job = self._jobs.get(key)
+            return job[1] if job else None
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._condition:
+            return key in self._jobs
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._jobs)
+
+    def _pop_due(self):
+        """Return the next due (key, callback), or the seconds to wait for it."""
+        while self._heap:
+            deadline, seq, key = self._heap[0]
+            job = self._jobs.get(key)
+            if job is None or job[0] != seq:
+                heapq.heappop(self._heap)  # cancelled or rescheduled
+                continue
+            wait = (deadline - datetime.now(self.tz)).total_seconds()
+            if wait > 0:
+                return None, min(wait, MAX_SLEEP_SECONDS)
+            heapq.heappop(self._heap)
+            del self._jobs[key]
+            return (key, job[2]), 0
+        return None, MAX_SLEEP_SECONDS
+
+    def run(self):
+        """Process jobs until stop() is called. Blocks the calling thread."""
+        self._running = True
+        while self._running:
+            with self._condition:
+                job, wait = self._pop_due()
+                if job is None:
+                    self._condition.wait(wait)
+                    continue
+            key, callback = job
+            try:
+                callback()
+            except Exception as e:
+                logger.error("Error running scheduled job %s: %s", key, e, exc_info=True)
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+# The bulk user endpoints accept large payloads, but keep each request small
+# enough to stay well under proxy body limits.
+BULK_CHUNK_SIZE = 100
+
+
+class UserDirectory:
+    def __init__(self, driver, ttl: float = 3600, max_size: int = 10000):
+        """Cache of Mattermost users with bulk resolution.
+
+        Args:
+            driver: Logged-in mattermostdriver.Driver instance
+            ttl (float, optional): Seconds before a cached user is refetched. Defaults to 3600.
+            max_size (int, optional): Maximum number of cached users (LRU). Defaults to 10000.
+        """
+        self.driver = driver
+        self.ttl = ttl
+        self.max_size = max_size
+        self._users = OrderedDict()  # Format: {user_id: (expires_at, user)}
+        self._ids_by_username = {}  # Format: {username: user_id}
+        self._lock = Lock()
+        self.requests_made = 0
+
+    def _get_cached(self, user_id: str) -> Optional[dict]:
+        entry = self._users.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._users.pop(user_id, None)
+            if self._ids_by_username.get(user['username']) == user_id:
+                self._ids_by_username.pop(user['username'], None)
+            return None
+        self._users.move_to_end(user_id)
+        return user
+
+    def _store(self, users: Iterable[dict]):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for user in users:
+                self._users[user['id']] = (expires_at, user)
+                self._users.move_to_end(user['id'])
+                self._ids_by_username[user['username']] = user['id']
+            while len(self._users) > self.max_size:
+                _, (_, evicted) = self._users.popitem(last=False)
+                if self._ids_by_username.get(evicted['username']) == evicted['id']:
+                    self._ids_by_username.pop(evicted['username'], None)
+
+    def _fetch_in_chunks(self, fetch, keys: List[str]) -> List[dict]:
+        fetched = []
+        for start in range(0, len(keys), BULK_CHUNK_SIZE):
+            chunk = keys[start:start + BULK_CHUNK_SIZE]
+            self.requests_made += 1
+            users = fetch(chunk) or []
+            self._store(users)
+            fetched.extend(users)
+        return fetched
+
+    def get_users(self, user_ids: Iterable[str]) -> Dict[str, dict]:
+        """Resolve user IDs to user objects, fetching all misses in bulk."""
+        result = {}
+        missing = []
+        with self._lock:
+            for user_id in dict.fromkeys(user_ids):
+                user = self._get_cached(user_id)
+                if user is None:
+                    missing.append(user_id)
+                else:
+                    result[user_id] = user
+        if missing:
+            for user in self._fetch_in_chunks(self.driver.users.get_users_by_ids, missing):
+                result[user['id']] = user
+        return result
+
+    def get_users_by_username(self, usernames: Iterable[str]) -> Dict[str, dict]:
+        """Resolve usernames to user objects, fetching all misses in bulk."""
+        result = {}
+        missing = []
+        with self._lock:
+            for username in dict.fromkeys(usernames):
+                user_id = self._ids_by_username.get(username)
+                user = self._get_cached(user_id) if user_id else None
+                if user is None:
+                    missing.append(username)
+                else:
+                    result[username] = user
+        if missing:
+            for user in self._fetch_in_chunks(self.driver.users.get_users_by_usernames, missing):
+                result[user['username']] = user
+        return result
+
+    def get_usernames(self, user_ids: Iterable[str]) -> List[str]:
+        """Map user IDs to usernames, preserving order and dropping unknown IDs."""
+        user_ids = list(user_ids)
+        users = self.get_users(user_ids)
+        return [users[user_id]['username'] for user_id in user_ids if user_id in users]
+
+    def get_username(self, user_id: str) -> Optional[str]:
+        user = self.get_users([user_id]).get(user_id)
+        return user['username'] if user else None
+
+    def get_user_id(self, username: str) -> Optional[str]:
+        user = self.get_users_by_username([username]).get(username)
+        return user['id'] if user else None
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            entry = self._users.pop(user_id, None)
+            if entry and self._ids_by_username.get(entry[1]['username']) == user_id:
+                self._ids_by_username.pop(entry[1]['username'], None)
@@ -0,0 +1,146 @@
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition, Thread
+from typing import Callable, Dict
+
+from bot_logging import get_logger
+
+logger = get_logger('validation')
+
+
+class ValidationPool:
+    def __init__(self, handler: Callable[[dict], None], workers: int = 4, queue_size: int = 200):
+        """Run report handling (AI validation, storage, feedback) off the websocket loop.
+
+        Args:
+            handler (Callable): Called with each submitted post on a worker thread
+            workers (int, optional): Number of worker threads. Defaults to 4.
+            queue_size (int, optional): Maximum number of posts waiting for a worker. Defaults to 200.
+        """
+        self.handler = handler
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = Thread(target=self._run, name=f"validation-{index}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Started %s validation workers", self.workers)
+
+    def submit(self, post: dict) -> bool:
+        """Queue a post for handling without ever blocking.
+
+        Called from the websocket event loop, which must keep running, so a
+        full queue rejects the post instead of waiting for a free slot.
+
+        Returns:
+            bool: False if the queue was full and the post was dropped
+        """
+        try:
+            self._queue.put_nowait(post)
+            return True
+        except queue.Full:
+            logger.warning("Validation queue full (%s posts), dropping post %s", self._queue.maxsize, post.get('id'))
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def join(self):
+        """Block until every queued post has been handled."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            post = self._queue.get()
+            try:
+                self.handler(post)
+            except Exception as e:
+                logger.error("Error in validation worker: %s", e, exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+class ValidationBatcher:
+    def __init__(self, validator, window: float = 2.0, max_items: int = 10, concurrency: int = 2):
+        """Group reports that arrive close together into one model request.
+
+        Args:
+            validator (AIValidator): Validator used for prechecks and batch requests
+            window (float, optional): Seconds to wait for more reports after the first one. Defaults to 2.0.
+            max_items (int, optional): Flush as soon as this many reports are waiting. Defaults to 10.
+            concurrency (int, optional): Batches waiting on the model at once. Defaults to 2.
+        """
+        self.validator = validator
+        self.window = window
+        self.max_items = max_items
+        self._pending = []  # Format: [(report_text, cache_key, future, enqueued_at)]
+        self._condition = Condition()
+        # Fixed threads, so each keeps one SQLite connection for verdict cache writes
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='validation-batch')
+        self.batches_sent = 0
+
+    def start(self):
+        thread = Thread(target=self._run, name="validation-batcher")
+        thread.daemon = True
+        thread.start()
+
+    def validate_report(self, report_text: str) -> Dict[str, any]:
+        """Drop-in replacement for AIValidator.validate_report that batches model calls.
+
+        Blocks the calling worker until its batch has been answered.
+        """
+        if not self.validator.enabled:
+            return self.validator.validate_report(report_text)
+        # Locally settled and cached reports never wait for the batch window
+        verdict, cache_key = self.validator.precheck(report_text)
+        if verdict is not None:
+            return verdict
+
+        future = Future()
+        with self._condition:
+            self._pending.append((report_text, cache_key, future, time.monotonic()))
+            self._condition.notify()
+        return future.result()
+
+    def _take_batch(self):
+        with self._condition:
+            while True:
+                if self._pending:
+                    wait = self._pending[0][3] + self.window - time.monotonic()
+                    if len(self._pending) >= self.max_items or wait <= 0:
+                        batch = self._pending[:self.max_items]
+                        del self._pending[:self.max_items]
+                        return batch
+                    self._condition.wait(wait)
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            self.batches_sent += 1
+            logger.info("Flushing validation batch of %s reports", len(batch))
+            # Keep collecting the next batch while this one waits on the model
+            self._executor.submit(self._validate_batch, batch)
+
+    def _validate_batch(self, batch):
+        try:
+            verdicts = self.validator.validate_batch(
+                [item[0] for item in batch],
+                [item[1] for item in batch]
+            )
+            for item, verdict in zip(batch, verdicts):
+                item[2].set_result(verdict)
+        except Exception as e:
+            logger.error("Error in validation batch: %s", e, exc_info=True)
+            for item in batch:
+                if not item[2].done():
+                    item[2].set_result({
+                        "valid": True,  # Same fallback as a failed single validation
+                        "message": "Unable to validate report at this time"
+                    })
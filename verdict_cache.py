@@ -0,0 +1,82 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional
+
+
+def normalize_report(report_text: str) -> str:
+    """Collapse whitespace and case so trivially different re-posts share a key."""
+    return " ".join(report_text.split()).casefold()
+
+
+class VerdictCache:
+    def __init__(self, database=None, max_entries: int = 1000, ttl: float = 7 * 24 * 3600,
+                 max_persisted: int = 10000):
+        """Cache of AI validation verdicts keyed by report content.
+
+        Args:
+            database (Database, optional): Persist verdicts in this database as well. Defaults to None.
+            max_entries (int, optional): Verdicts kept in memory (LRU). Defaults to 1000.
+            ttl (float, optional): Seconds a verdict stays valid. Defaults to 7 days.
+            max_persisted (int, optional): Verdicts kept in the database table. Defaults to 10000.
+        """
+        self.database = database
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_persisted = max_persisted
+        self._entries = OrderedDict()  # Format: {key: (expires_at, verdict)}
+        self._lock = Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(report_text: str, model: str, prompt_version: int) -> str:
+        payload = f"{model}\0{prompt_version}\0{normalize_report(report_text)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._entries[key]
+
+        verdict = None
+        if self.database is not None:
+            row = self.database.get_cached_verdict(key, now)
+            if row is not None:
+                expires_at, verdict = row
+                self._remember(key, expires_at, verdict)
+
+        with self._lock:
+            if verdict is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(verdict)
+
+    def put(self, key: str, verdict: Dict[str, any]):
+        expires_at = time.time() + self.ttl
+        verdict = {"valid": verdict["valid"], "message": verdict["message"]}
+        self._remember(key, expires_at, verdict)
+        if self.database is not None:
+            self.database.store_cached_verdict(key, expires_at, verdict)
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % 100 == 0
+            # Evicting on every write would scan the table each time
+            if prune:
+                self.database.prune_cached_verdicts(time.time(), self.max_persisted)
+
+    def _remember(self, key: str, expires_at: float, verdict: Dict[str, any]):
+        with self._lock:
+            self._entries[key] = (expires_at, verdict)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -1,45 +1,49 @@
 import sqlite3
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import calendar
 import argparse
 from tabulate import tabulate
 from collections import defaultdict
-import json
+from database import get_database
+from report_export import EXPORT_FORMATS, export_reports
+import sys
+
+def count_working_days(start_date, end_date):
+    """Count Monday-Saturday days between two dates, inclusive, without walking the calendar."""
+    if end_date < start_date:
+        return 0
+    weeks, extra_days = divmod((end_date - start_date).days + 1, 7)
+    # Every full week has six working days; check the leftover days one by one
+    leftover = sum(1 for offset in range(extra_days) if (start_date.weekday() + offset) % 7 != 6)
+    return weeks * 6 + leftover
 
 def get_working_days(year, month):
     """Get the number of working days (Monday-Saturday) up to current date for current month,
     or all working days for past months."""
-    c = calendar.Calendar()
-    working_days = 0
     current_date = datetime.now().date()
-    
-    for date in c.itermonthdates(year, month):
-        # Skip dates not in the target month
-        if date.month != month:
-            continue
-            
-        # For current month, only count days up to today
-        if year == current_date.year and month == current_date.month and date > current_date:
-            continue
-            
-        # Count Monday(0) to Saturday(5)
-        if date.weekday() < 6:
-            working_days += 1
-            
-    return working_days
+    first_day = date(year, month, 1)
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
 
-def get_monthly_reports(db_path, year, month):
-    """Get all reports and statistics for the specified month."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    # For current month, only count days up to today
+    if year == current_date.year and month == current_date.month:
+        last_day = current_date
 
-    # Get start and end date for the month
+    return count_working_days(first_day, last_day)
+
+def get_month_range(year, month):
+    """Return the first and last day of a month as YYYY-MM-DD strings."""
     start_date = datetime(year, month, 1).strftime('%Y-%m-%d')
     if month == 12:
         end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
     else:
         end_date = datetime(year, month + 1, 1) - timedelta(days=1)
-    end_date = end_date.strftime('%Y-%m-%d')
+    return start_date, end_date.strftime('%Y-%m-%d')
+
+def get_monthly_reports(db_path, year, month):
+    """Get all reports for the specified month."""
+    conn = get_database(db_path).get_connection()
+    cursor = conn.cursor()
+    start_date, end_date = get_month_range(year, month)
 
     # Get all reports for the month including channel information
     cursor.execute("""
@@ -48,81 +52,115 @@ def get_monthly_reports(db_path, year, month):
         WHERE report_date BETWEEN ? AND ?
         ORDER BY report_date, username
     """, (start_date, end_date))
-    reports = cursor.fetchall()
+    return cursor.fetchall()
 
-    # Get all bot report requests for the month
-    cursor.execute("""
-        SELECT channel_id, channel_name, request_date, requested_users
-        FROM bot_report_requests 
-        WHERE request_date BETWEEN ? AND ?
-    """, (start_date, end_date))
-    bot_requests = cursor.fetchall()
-
-    # Process bot requests into a structure tracking which users were requested on which days
-    channel_requests = {}  # {channel_id: {name: str, dates: {date: set(usernames)}}}
-    for channel_id, channel_name, request_date, requested_users_json in bot_requests:
-        if channel_id not in channel_requests:
-            channel_requests[channel_id] = {'name': channel_name, 'dates': {}}
-        
-        # Parse the JSON array of requested users
-        requested_users = json.loads(requested_users_json)
-        channel_requests[channel_id]['dates'][request_date] = set(requested_users)
-
-    conn.close()
-    return reports, channel_requests
-
-def analyze_reports(reports, channel_requests, year, month):
-    """Analyze reports and generate statistics."""
-    user_reports = defaultdict(lambda: defaultdict(list))  # {username: {channel_id: [(date, message)]}}
-    all_users = set()  # Track all users who were requested to report
-    
-    # Organize reports by user and channel
-    for username, date, message, channel_id, channel_name in reports:
-        user_reports[username][channel_id].append((date, message))
+def get_monthly_stats(database, year, month, date=None, username=None, channel=None):
+    """Statistics for the month from the daily_stats rollup.
+
+    A report only counts on a day its author was asked for one in that
+    channel, and at most once per day. Message bodies and request JSON are
+    never read. The optional filters limit which submitted reports are
+    counted. `database` is the caller's Database, so a read-only viewer
+    instance stays read-only.
+    """
+    start_date, end_date = get_month_range(year, month)
+    rows = database.get_daily_stats(
+        start_date, end_date, date=date, username=username, channel_name=channel
+    )
+
+    return summarize_stats(rows)
 
-    # Get all users who were requested to report
-    for channel_id, channel_info in channel_requests.items():
-        for date_users in channel_info['dates'].values():
-            all_users.update(date_users)
+def summarize_stats(rows):
+    """Turn (username, channel_id, channel_name, requested, submitted) rows into per-user rows:
+    [username, submitted, missed, rate, channel breakdown]."""
+    user_channels = defaultdict(list)  # {username: [(channel_name, submitted, expected)]}
+    for username, channel_id, channel_name, requested, submitted in rows:
+        user_channels[username].append((channel_name, submitted, requested))
 
-    # Calculate statistics
     stats = []
-    for username in all_users:
-        total_submitted = 0
-        total_expected = 0
-        channel_stats = []
-
-        # Check each channel where the user was requested to report
-        for channel_id, channel_info in channel_requests.items():
-            channel_name = channel_info['name']
-            
-            # Count days when this user was expected to report in this channel
-            expected = sum(1 for date_users in channel_info['dates'].values() 
-                         if username in date_users)
-            
-            if expected > 0:  # Only process channels where the user was requested
-                # Count submitted reports for this channel
-                submitted = len(user_reports[username][channel_id])
-                total_submitted += submitted
-                total_expected += expected
-                
-                # Add channel statistics
-                channel_stats.append(f"{channel_name}: {submitted}/{expected}")
-
-        # Calculate overall statistics
-        missed_reports = total_expected - total_submitted if total_expected > 0 else 0
-        submission_rate = (total_submitted / total_expected * 100) if total_expected > 0 else 0
-        
+    for username, channels in user_channels.items():
+        total_submitted = sum(submitted for _, submitted, _ in channels)
+        total_expected = sum(expected for _, _, expected in channels)
+        missed_reports = total_expected - total_submitted
+        submission_rate = total_submitted / total_expected * 100
         stats.append([
             username,
             total_submitted,
             missed_reports,
             f"{submission_rate:.1f}%",
-            ", ".join(channel_stats) if channel_stats else "No reports requested"
+            ", ".join(f"{name}: {submitted}/{expected}" for name, submitted, expected in sorted(channels))
         ])
 
     return sorted(stats, key=lambda x: x[0])  # Sort by username
 
+def iso_date(value):
+    """Normalize a YYYY-MM-DD date, raising ValueError for anything else.
+
+    Report dates are stored and compared as text, so an unpadded date such
+    as 2026-9-1 would silently match nothing.
+    """
+    return date.fromisoformat(value).isoformat()
+
+def get_period_keys(start, end, group_by):
+    """Every day, week (keyed by its Monday) or month bucket between two dates, in order."""
+    if group_by == 'day':
+        return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+    if group_by == 'week':
+        monday = start - timedelta(days=start.weekday())
+        return [(monday + timedelta(weeks=offset)).isoformat()
+                for offset in range((end - monday).days // 7 + 1)]
+    months = (end.year - start.year) * 12 + end.month - start.month
+    return [f"{(start.month - 1 + offset) // 12 + start.year}-{(start.month - 1 + offset) % 12 + 1:02d}"
+            for offset in range(months + 1)]
+
+def get_range_stats(database, start_date, end_date, group_by='day'):
+    """Submission statistics over any date range, grouped for trend charts.
+
+    The series are returned column-wise (one list per measure) to keep
+    responses small. Day, week and month series include empty periods, so
+    every point on a chart's time axis is present.
+
+    Args:
+        database (Database): Database to read, e.g. the viewer's read-only instance
+        start_date (str): First day, YYYY-MM-DD
+        end_date (str): Last day, YYYY-MM-DD
+        group_by (str, optional): day, week, month, user or channel. Defaults to 'day'.
+
+    Returns:
+        dict: Range, working days, per-bucket series and totals
+    """
+    rows = database.get_stats_series(start_date, end_date, group_by)
+    buckets = {key: (label, expected, submitted, reports) for key, label, expected, submitted, reports in rows}
+    if group_by in ('day', 'week', 'month'):
+        keys = get_period_keys(date.fromisoformat(start_date), date.fromisoformat(end_date), group_by)
+    else:
+        keys = [row[0] for row in rows]
+
+    series = {'keys': keys, 'labels': [], 'expected': [], 'submitted': [], 'reports': [], 'rate': []}
+    for key in keys:
+        label, expected, submitted, reports = buckets.get(key, (key, 0, 0, 0))
+        series['labels'].append(label)
+        series['expected'].append(expected)
+        series['submitted'].append(submitted)
+        series['reports'].append(reports)
+        series['rate'].append(round(submitted / expected * 100, 1) if expected else None)
+
+    total_expected = sum(series['expected'])
+    total_submitted = sum(series['submitted'])
+    return {
+        'from': start_date,
+        'to': end_date,
+        'group_by': group_by,
+        'working_days': count_working_days(date.fromisoformat(start_date), date.fromisoformat(end_date)),
+        'series': series,
+        'totals': {
+            'expected': total_expected,
+            'submitted': total_submitted,
+            'reports': sum(series['reports']),
+            'rate': round(total_submitted / total_expected * 100, 1) if total_expected else None
+        }
+    }
+
 def display_reports(reports, stats, year, month):
     """Display the reports and statistics in a formatted way."""
     month_name = calendar.month_name[month]
@@ -139,14 +177,41 @@ def display_reports(reports, stats, year, month):
     # Display detailed reports
     print(f"\nDetailed Reports for {month_name} {year}:")
     current_date = None
-    for username, date, message, channel_id, channel_name in sorted(reports, key=lambda x: (x[1], x[0])):
-        if date != current_date:
-            print(f"\n[{date}]")
-            current_date = date
+    for username, report_date, message, channel_id, channel_name in sorted(reports, key=lambda x: (x[1], x[0])):
+        if report_date != current_date:
+            print(f"\n[{report_date}]")
+            current_date = report_date
         print(f"- {username} ({channel_name}):")
         for line in message.split('\n'):
             print(f"  {line}")
 
+def export_to_file(args):
+    """Stream the reports in the requested range to --output or stdout."""
+    start_date, end_date = get_month_range(args.year, args.month)
+    rows = get_database(args.db).iter_reports(args.from_date or start_date, args.to_date or end_date)
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        for chunk in export_reports(rows, args.export):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+def display_search_results(args):
+    """Print the best matches for --search, with the matching words in [brackets]."""
+    results = get_database(args.db).search_reports(
+        args.search, start_date=args.from_date, end_date=args.to_date, limit=50
+    )
+    if not results:
+        print(f"No reports match '{args.search}'")
+        return
+    print(f"\n=== Reports matching '{args.search}' ===\n")
+    rows = [
+        [report_date, username, channel_name, snippet]
+        for report_id, report_date, username, channel_id, channel_name, snippet, rank in results
+    ]
+    print(tabulate(rows, headers=["Date", "Username", "Channel", "Match"], tablefmt="grid"))
+
 def main():
     parser = argparse.ArgumentParser(description='View daily reports from database')
     parser.add_argument('--month', type=int, default=datetime.now().month,
@@ -155,12 +220,33 @@ def main():
                       help='Year (YYYY)')
     parser.add_argument('--db', type=str, default='daily_reports.db',
                       help='Path to the database file')
+    parser.add_argument('--rebuild-stats', action='store_true',
+                      help='Recompute the daily_stats rollup from the report tables first')
+    parser.add_argument('--export', choices=sorted(EXPORT_FORMATS),
+                      help='Stream reports in this format instead of showing statistics')
+    parser.add_argument('--from', dest='from_date', type=iso_date,
+                      help='First day to export or search (YYYY-MM-DD); exports default to the start of --month')
+    parser.add_argument('--to', dest='to_date', type=iso_date,
+                      help='Last day to export or search (YYYY-MM-DD); exports default to the end of --month')
+    parser.add_argument('--output', type=str,
+                      help='Write the export to this file instead of stdout')
+    parser.add_argument('--search', type=str,
+                      help='Full-text search report messages (within --from/--to if given)')
     
     args = parser.parse_args()
 
     try:
-        reports, channel_requests = get_monthly_reports(args.db, args.year, args.month)
-        stats = analyze_reports(reports, channel_requests, args.year, args.month)
+        if args.rebuild_stats:
+            get_database(args.db).rebuild_daily_stats()
+        if args.export:
+            export_to_file(args)
+            return
+        if args.search:
+            display_search_results(args)
+            return
+        reports = get_monthly_reports(args.db, args.year, args.month)
+        # Same rollup as the web viewer, so both show the same numbers
+        stats = get_monthly_stats(get_database(args.db), args.year, args.month)
         display_reports(reports, stats, args.year, args.month)
     except sqlite3.Error as e:
         print(f"Database error: {e}")
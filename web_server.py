@@ -1,18 +1,48 @@
-from flask import Flask, render_template, jsonify, request
-from datetime import datetime
+from flask import Flask, Response, render_template, jsonify, request
+from datetime import date, datetime
 import calendar
-from database import Database
-from view_reports import get_monthly_reports, analyze_reports
+from database import STATS_GROUPINGS, get_database
+from view_reports import get_month_range, get_monthly_stats, get_range_stats, iso_date
+from response_cache import ResponseCache
+from report_export import EXPORT_FORMATS, export_reports
+from config import API_CACHE_SIZE, STATS_CACHE_SIZE
 import os
+import sqlite3
 
 app = Flask(__name__)
-db = Database()
+# The viewer never writes: its connections are read-only, so they cannot
+# take locks that would hold up the bot's writes
+db = get_database(read_only=True)
+response_cache = ResponseCache(db, max_entries=API_CACHE_SIZE)
+# Trend charts are few and expensive; keep them from being evicted by report pages
+stats_cache = ResponseCache(db, max_entries=STATS_CACHE_SIZE)
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+MAX_PAGE_SIZE = 1000
+
+def parse_cursor(cursor):
+    """Turn a 'YYYY-MM-DD:id' cursor from a previous page into (report_date, id)."""
+    report_date, _, report_id = cursor.partition(':')
+    # Normalized, since (report_date, id) is compared as text
+    return iso_date(report_date), int(report_id)
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: the database is reachable and fully migrated."""
+    try:
+        applied, expected = db.get_schema_version()
+        db.get_change_token()
+    except sqlite3.Error as e:
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
+    if applied < expected:
+        return jsonify({'status': 'migrating', 'schema_version': applied}), 503
+    return jsonify({'status': 'ready', 'schema_version': applied})
+
 @app.route('/api/reports')
+@response_cache.cached
 def get_reports():
     # Get query parameters
     year = request.args.get('year', datetime.now().year, type=int)
@@ -20,39 +50,52 @@ def get_reports():
     date = request.args.get('date', None)  # Optional date filter in YYYY-MM-DD format
     username = request.args.get('username', None)  # Optional username filter
     channel = request.args.get('channel', None)  # Optional channel filter
-    
-    # Reuse existing report gathering logic
-    reports, channel_requests = get_monthly_reports(db.db_path, year, month)
-    
-    # Get all unique users and channels from bot requests
-    all_users = set()
-    all_channels = set()
-    for channel_id, channel_info in channel_requests.items():
-        all_channels.add(channel_info['name'])
-        for date_users in channel_info['dates'].values():
-            all_users.update(date_users)
-    
-    # Apply filters
-    if date:
-        reports = [r for r in reports if r[1] == date]
-    if username:
-        reports = [r for r in reports if r[0] == username]
-    if channel:
-        reports = [r for r in reports if r[4] == channel]  # channel_name is at index 4
-    
-    stats = analyze_reports(reports, channel_requests, year, month)
-    
+    limit = request.args.get('limit', None, type=int)  # Optional page size; all reports if omitted
+    cursor = request.args.get('cursor', None)  # next_cursor of the previous page
+    include_messages = request.args.get('include_messages', 'true').lower() not in ('false', '0', 'no')
+
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    before = None
+    if cursor:
+        try:
+            before = parse_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    start_date, end_date = get_month_range(year, month)
+    # Fetch one extra row to learn whether there is a next page
+    rows = db.get_reports_page(
+        start_date, end_date,
+        date=date, username=username, channel_name=channel,
+        limit=limit + 1 if limit is not None else None,
+        before=before,
+        include_messages=include_messages
+    )
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1][2]}:{rows[-1][0]}"
+
+    reports = []
+    for row in rows:
+        report = {
+            'id': row[0],
+            'username': row[1],
+            'date': row[2],
+            'channel_id': row[3],
+            'channel_name': row[4]
+        }
+        if include_messages:
+            report['message'] = row[5]
+        reports.append(report)
+
+    stats = get_monthly_stats(db, year, month, date=date, username=username, channel=channel)
+    channel_names, usernames = db.get_filter_values(start_date, end_date)
+
     return jsonify({
-        'reports': [
-            {
-                'username': report[0],
-                'date': report[1],
-                'message': report[2],
-                'channel_id': report[3],
-                'channel_name': report[4]
-            }
-            for report in reports
-        ],
+        'reports': reports,
+        'next_cursor': next_cursor,
         'statistics': [
             {
                 'username': stat[0],
@@ -64,11 +107,172 @@ def get_reports():
             for stat in stats
         ],
         'filters': {
-            'channels': sorted(all_channels),
-            'usernames': sorted(all_users)
+            'channels': channel_names,
+            'usernames': usernames
         }
     })
 
+MAX_TABLE_PAGE_SIZE = 100
+# DataTables column data -> daily_reports column it sorts on
+TABLE_COLUMNS = {'date': 'report_date', 'username': 'username', 'channel_name': 'channel_name'}
+
+@app.route('/api/reports/table')
+def reports_table():
+    """DataTables server-side processing endpoint for the dashboard's reports table.
+
+    Takes the draw/start/length/search[value]/order[0][...] parameters DataTables
+    sends, plus the dashboard's year, month, date, username and channel filters.
+    Rows carry no message body; /api/reports/<id> returns it when a row is expanded.
+    """
+    year = request.args.get('year', datetime.now().year, type=int)
+    month = request.args.get('month', datetime.now().month, type=int)
+    draw = request.args.get('draw', 0, type=int)
+    start = max(0, request.args.get('start', 0, type=int))
+    length = max(1, min(request.args.get('length', 25, type=int), MAX_TABLE_PAGE_SIZE))
+    order_index = request.args.get('order[0][column]', 0, type=int)
+    order_column = request.args.get(f'columns[{order_index}][data]', 'date')
+    descending = request.args.get('order[0][dir]', 'desc') != 'asc'
+
+    start_date, end_date = get_month_range(year, month)
+    total, filtered, rows = db.get_reports_table(
+        start_date, end_date,
+        date=request.args.get('date', None),
+        username=request.args.get('username', None),
+        channel_name=request.args.get('channel', None),
+        search=request.args.get('search[value]', None),
+        order_by=TABLE_COLUMNS.get(order_column, 'report_date'),
+        descending=descending,
+        offset=start,
+        limit=length
+    )
+    return jsonify({
+        'draw': draw,
+        'recordsTotal': total,
+        'recordsFiltered': filtered,
+        'data': [
+            {
+                'id': row[0],
+                'username': row[1],
+                'date': row[2],
+                'channel_id': row[3],
+                'channel_name': row[4]
+            }
+            for row in rows
+        ]
+    })
+
+@app.route('/api/reports/<int:report_id>')
+@response_cache.cached
+def get_report(report_id):
+    row = db.get_report(report_id)
+    if row is None:
+        return jsonify({'error': 'Report not found'}), 404
+    return jsonify({
+        'id': row[0],
+        'username': row[1],
+        'date': row[2],
+        'channel_id': row[3],
+        'channel_name': row[4],
+        'message': row[5]
+    })
+
+@app.route('/api/export')
+def export():
+    # Streams any date range; defaults to the current month
+    default_start, default_end = get_month_range(datetime.now().year, datetime.now().month)
+    export_format = request.args.get('format', 'csv')
+    username = request.args.get('username', None)
+    channel = request.args.get('channel', None)
+
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        start_date = iso_date(request.args.get('from', default_start))
+        end_date = iso_date(request.args.get('to', default_end))
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    rows = db.iter_reports(start_date, end_date, username=username, channel_name=channel)
+    # No Content-Length, so the WSGI server sends the body in chunks as it is generated
+    return Response(
+        export_reports(rows, export_format),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=reports_{start_date}_{end_date}.{extension}'}
+    )
+
+MAX_SEARCH_RESULTS = 200
+
+@app.route('/api/search')
+@response_cache.cached
+def search():
+    query = request.args.get('q', '').strip()
+    start_date = request.args.get('from', None)  # Optional YYYY-MM-DD bounds
+    end_date = request.args.get('to', None)
+    username = request.args.get('username', None)
+    channel = request.args.get('channel', None)
+    limit = max(1, min(request.args.get('limit', 50, type=int), MAX_SEARCH_RESULTS))
+
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    try:
+        start_date = iso_date(start_date) if start_date else None
+        end_date = iso_date(end_date) if end_date else None
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+
+    results = db.search_reports(
+        query, start_date=start_date, end_date=end_date,
+        username=username, channel_name=channel, limit=limit
+    )
+    return jsonify({
+        'query': query,
+        'results': [
+            {
+                'id': row[0],
+                'date': row[1],
+                'username': row[2],
+                'channel_id': row[3],
+                'channel_name': row[4],
+                'snippet': row[5],
+                'rank': row[6]
+            }
+            for row in results
+        ]
+    })
+
+# Longest from..to span /api/stats accepts per group_by, in days. Period series
+# have a point per day, week or month, so this bounds the size of a response.
+MAX_STATS_RANGE_DAYS = {
+    'day': 2 * 366,
+    'week': 10 * 366,
+    'month': 50 * 366,
+    'user': 50 * 366,
+    'channel': 50 * 366,
+}
+
+@app.route('/api/stats')
+@stats_cache.cached
+def stats():
+    # Defaults to the current month up to today
+    today = datetime.now().date()
+    group_by = request.args.get('group_by', 'day')
+
+    if group_by not in STATS_GROUPINGS:
+        return jsonify({'error': f"group_by must be one of {', '.join(STATS_GROUPINGS)}"}), 400
+    try:
+        start_date = iso_date(request.args.get('from', today.replace(day=1).isoformat()))
+        end_date = iso_date(request.args.get('to', today.isoformat()))
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+    if start_date > end_date:
+        return jsonify({'error': 'from must not be after to'}), 400
+    days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+    if days > MAX_STATS_RANGE_DAYS[group_by]:
+        return jsonify({'error': f"group_by={group_by} covers at most {MAX_STATS_RANGE_DAYS[group_by]} days"}), 400
+
+    return jsonify(get_range_stats(db, start_date, end_date, group_by))
+
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
     os.makedirs('templates', exist_ok=True)
@@ -0,0 +1,113 @@
+import json
+import logging
+import re
+from typing import Callable, Dict, Optional, Tuple
+
+from bot_logging import get_logger, sampler
+
+try:
+    # Optional: several times faster than the stdlib decoder on post payloads
+    import orjson
+    loads = orjson.loads
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    loads = json.loads
+    JSON_BACKEND = 'json'
+
+logger = get_logger('websocket')
+
+# Top-level "event" key of a websocket frame; nested payloads are JSON-escaped
+# strings, so the first unescaped match is the frame's own type
+EVENT_TYPE_PATTERN = re.compile(r'"event"\s*:\s*"([^"]+)"')
+# Keys of the post embedded as an escaped JSON string in a "posted" frame.
+# Quotes inside the message are escaped twice, so message text cannot match.
+POST_FIELD_PATTERNS = {
+    field: re.compile(r'\\"%s\\":\s*\\"([A-Za-z0-9]*)\\"' % field)
+    for field in ('user_id', 'channel_id', 'root_id')
+}
+
+
+def peek_event_type(raw: str) -> Optional[str]:
+    match = EVENT_TYPE_PATTERN.search(raw)
+    return match.group(1) if match else None
+
+
+def peek_post_fields(raw: str) -> Optional[Tuple[str, str, str]]:
+    """Read (user_id, channel_id, root_id) of a raw "posted" frame without decoding it.
+
+    Returns None when any field cannot be found, so callers fall back to a full decode.
+    """
+    values = []
+    for pattern in POST_FIELD_PATTERNS.values():
+        match = pattern.search(raw)
+        if match is None:
+            return None
+        values.append(match.group(1))
+    return tuple(values)
+
+
+class EventDispatcher:
+    def __init__(self):
+        """Route websocket events to handlers by event type.
+
+        Frames arrive as JSON strings. The event type, and for registered
+        prefilters a few fields, are read straight from the raw string so
+        events nobody handles are dropped without being decoded at all.
+        """
+        self._handlers = {}  # Format: {event_type: handler(event)}
+        self._prefilters = {}  # Format: {event_type: prefilter(raw) -> bool}
+        self.dropped = 0
+        self.decoded = 0
+
+    def register(self, event_type: str, handler: Callable[[dict], None],
+                 prefilter: Optional[Callable[[str], bool]] = None):
+        """Handle `event_type` with `handler`.
+
+        Args:
+            event_type (str): Mattermost websocket event name, e.g. 'posted'
+            handler (Callable): Called with the decoded event
+            prefilter (Callable, optional): Called with the raw frame first; returning
+                False drops the event undecoded. Defaults to None.
+        """
+        self._handlers[event_type] = handler
+        if prefilter is not None:
+            self._prefilters[event_type] = prefilter
+
+    def dispatch(self, event):
+        if isinstance(event, str):
+            event_type = peek_event_type(event)
+            if event_type is not None and not self._wants(event_type, event):
+                return
+            try:
+                event = loads(event)
+            except ValueError as e:
+                logger.error("Failed to parse event as JSON: %s", e)
+                return
+
+        event_type = event.get('event')
+        handler = self._handlers.get(event_type)
+        if handler is None:
+            self._drop(event_type)
+            return
+        self.decoded += 1
+        if logger.isEnabledFor(logging.DEBUG) and sampler.should_log(event_type):
+            logger.debug("Received %s event: %s", event_type, event)
+        handler(event)
+
+    def stats(self) -> Dict[str, int]:
+        return {'dropped': self.dropped, 'decoded': self.decoded}
+
+    def _wants(self, event_type: str, raw: str) -> bool:
+        if event_type not in self._handlers:
+            self._drop(event_type)
+            return False
+        prefilter = self._prefilters.get(event_type)
+        if prefilter is not None and not prefilter(raw):
+            self._drop(event_type)
+            return False
+        return True
+
+    def _drop(self, event_type):
+        self.dropped += 1
+        if logger.isEnabledFor(logging.DEBUG) and sampler.should_log(event_type):
+            logger.debug("Dropped %s event", event_type)
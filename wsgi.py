@@ -0,0 +1,23 @@
+"""Production entry point for the report viewer.
+
+Run `python wsgi.py` to serve with waitress (WEB_THREADS worker threads), or
+point any WSGI server at `wsgi:app`, e.g. `gunicorn -w 4 --threads 8 wsgi:app`.
+Every worker thread opens its own read-only SQLite connection.
+"""
+from waitress import serve
+
+from bot_logging import get_logger
+from config import WEB_CONNECTION_LIMIT, WEB_HOST, WEB_PORT, WEB_THREADS
+from web_server import app
+
+logger = get_logger('wsgi')
+
+
+def main():
+    logger.info("Serving report viewer on %s:%d with %d threads", WEB_HOST, WEB_PORT, WEB_THREADS)
+    serve(app, host=WEB_HOST, port=WEB_PORT, threads=WEB_THREADS,
+          connection_limit=WEB_CONNECTION_LIMIT)
+
+
+if __name__ == '__main__':
+    main()